@@ -50,6 +50,16 @@ def create_app(config_name=None):
     app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
     app.register_blueprint(thesaurus_bp, url_prefix='/api/thesaurus')
 
+    # Keep stats snapshots, timeline rollups, chronology dates and measurements in step with catalogue writes
+    from .services.stats_service import register_snapshot_invalidation
+    from .services.timeline_service import register_rollup_maintenance
+    from .services.chronology_service import register_chronology_dating
+    from .services.measurement_service import register_measurement_parsing
+    register_snapshot_invalidation()
+    register_rollup_maintenance()
+    register_chronology_dating()
+    register_measurement_parsing()
+
     # Health check endpoint
     @app.route('/api/health')
     def health_check():
@@ -1,23 +1,110 @@
 """
 Analytics API routes for advanced statistical analysis.
 """
+import json
 from flask import request, jsonify, send_file, current_app
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import select, func
 from . import analytics_bp
 from ...models import Artifact
-from ...services.analytics_service import AnalyticsService
-from ...services.export_service import generate_excel_report, generate_docx_report
+from ...extensions import db
+from ...services.analytics_cache import AnalyticsFrameCache
+from ...services.search_service import normalize_search_params, search_conditions
+from ...services.job_service import enqueue, job_handler, parse_priority, job_status_response, job_download_response
 from datetime import datetime
 
 
-def get_artifacts_data(collection: str = None):
-    """Get artifact data as list of dictionaries."""
-    query = Artifact.query
-    if collection:
-        query = query.filter(Artifact.collection == collection)
+# pandas, scipy and the report writers are imported on first use, so workers
+# and CLI commands that never serve analytics do not pay for loading them
+
+# Default variables of the association matrix
+ASSOCIATION_VARIABLES = (
+    'collection', 'object_type', 'material', 'chronology',
+    'findspot', 'production_place', 'on_display'
+)
+
 
-    artifacts = query.all()
-    return [a.to_dict() for a in artifacts]
+def get_artifacts_data(collection: str = None, filters: dict = None):
+    """
+    Load only the analysis columns of the artifacts straight into a DataFrame.
+    Search filters (see search_service) are applied in SQL, so only matching
+    rows reach pandas.
+    """
+    import pandas as pd
+    from ...services.analytics_service import ANALYSIS_COLUMNS
+
+    query = select(*[getattr(Artifact, c) for c in ANALYSIS_COLUMNS])
+    if collection:
+        query = query.where(Artifact.collection == collection)
+    if filters:
+        query = query.where(*search_conditions(filters))
+
+    rows = db.session.execute(query).all()
+    return pd.DataFrame.from_records(rows, columns=ANALYSIS_COLUMNS)
+
+
+def _get_frame_cache() -> AnalyticsFrameCache:
+    """Per-worker analytics cache, sized from the app config."""
+    cache = current_app.extensions.get('analytics_frame_cache')
+    if cache is None:
+        cache = AnalyticsFrameCache(
+            max_entries=current_app.config.get('ANALYTICS_CACHE_MAX_ENTRIES', 8),
+            max_bytes=current_app.config.get('ANALYTICS_CACHE_MAX_MB', 256) * 1024 * 1024
+        )
+        current_app.extensions['analytics_frame_cache'] = cache
+    return cache
+
+
+def _data_version(collection: str = None):
+    """
+    Cheap probe that changes whenever the analysed artifacts change.
+    Taken over the whole collection, so a write invalidates every filtered
+    frame of that collection too.
+    """
+    query = select(func.max(Artifact.updated_at), func.count(Artifact.id))
+    if collection:
+        query = query.where(Artifact.collection == collection)
+    return tuple(db.session.execute(query).one())
+
+
+def get_analytics_service(collection: str = None, filters: dict = None):
+    """
+    Prepared AnalyticsService for a collection and normalized search filters,
+    or None if no artifact matches. Cached per (collection, filters).
+    """
+    def build():
+        from ...services.analytics_service import AnalyticsService
+
+        artifacts_data = get_artifacts_data(collection, filters)
+        if artifacts_data.empty:
+            return None
+        return AnalyticsService(artifacts_data)
+
+    key = (collection, tuple(sorted((filters or {}).items())))
+    return _get_frame_cache().get_or_build(key, _data_version(collection), build)
+
+
+def _request_filters():
+    """Search filters of the request (see search_service.normalize_search_params)."""
+    return normalize_search_params(request.args)
+
+
+def _table_bounds(values):
+    """(max_rows, max_cols) from query args or a JSON body; None leaves an axis unbounded."""
+    bounds = []
+    for key in ('max_rows', 'max_cols'):
+        value = values.get(key)
+        if value in (None, ''):
+            bounds.append(None)
+            continue
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'{key} must be an integer')
+        if value < 2:
+            raise ValueError(f'{key} must be at least 2')
+        bounds.append(value)
+    return tuple(bounds)
 
 
 @analytics_bp.route('/report', methods=['GET'])
@@ -26,11 +113,10 @@ def get_comprehensive_report():
     """Get comprehensive analytics report."""
     collection = request.args.get('collection')
 
-    artifacts_data = get_artifacts_data(collection)
-    if not artifacts_data:
+    service = get_analytics_service(collection, _request_filters())
+    if service is None:
         return jsonify({'error': 'No artifacts found'}), 404
 
-    service = AnalyticsService(artifacts_data)
     report = service.generate_comprehensive_report()
 
     return jsonify(report)
@@ -42,11 +128,10 @@ def get_distribution(variable):
     """Get distribution analysis for a specific variable."""
     collection = request.args.get('collection')
 
-    artifacts_data = get_artifacts_data(collection)
-    if not artifacts_data:
+    service = get_analytics_service(collection, _request_filters())
+    if service is None:
         return jsonify({'error': 'No artifacts found'}), 404
 
-    service = AnalyticsService(artifacts_data)
     result = service.get_distribution_analysis(variable)
 
     return jsonify(result)
@@ -55,21 +140,35 @@ def get_distribution(variable):
 @analytics_bp.route('/crosstab', methods=['GET'])
 @jwt_required()
 def get_cross_tabulation():
-    """Get cross-tabulation between two variables."""
+    """
+    Get cross-tabulation between two variables.
+
+    Optional max_rows / max_cols fold the least frequent categories into
+    "Other" before the chi-square test; sparse=true returns only the
+    non-zero cells. method=monte_carlo (or auto) computes the p-value with a
+    seeded permutation test, for tables with small expected counts.
+    """
     row_var = request.args.get('row')
     col_var = request.args.get('col')
     collection = request.args.get('collection')
+    sparse = request.args.get('sparse', '').lower() == 'true'
+    method = request.args.get('method', 'asymptotic')
+    seed = request.args.get('seed', 0, type=int)
 
     if not row_var or not col_var:
         return jsonify({'error': 'Both row and col parameters required'}), 400
 
-    artifacts_data = get_artifacts_data(collection)
-    if not artifacts_data:
+    try:
+        max_rows, max_cols = _table_bounds(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    service = get_analytics_service(collection, _request_filters())
+    if service is None:
         return jsonify({'error': 'No artifacts found'}), 404
 
-    service = AnalyticsService(artifacts_data)
-    crosstab = service.get_cross_tabulation(row_var, col_var)
-    chi_square = service.chi_square_test(row_var, col_var)
+    crosstab = service.get_cross_tabulation(row_var, col_var, max_rows, max_cols, sparse=sparse)
+    chi_square = service.chi_square_test(row_var, col_var, max_rows, max_cols, method=method, seed=seed)
 
     return jsonify({
         'crosstab': crosstab,
@@ -88,24 +187,36 @@ def analyze_correlation():
     if len(variables) < 2:
         return jsonify({'error': 'At least 2 variables required'}), 400
 
-    artifacts_data = get_artifacts_data(collection)
-    if not artifacts_data:
-        return jsonify({'error': 'No artifacts found'}), 404
+    try:
+        max_rows, max_cols = _table_bounds(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    service = AnalyticsService(artifacts_data)
+    service = get_analytics_service(collection, normalize_search_params(data))
+    if service is None:
+        return jsonify({'error': 'No artifacts found'}), 404
 
     results = {
         'variables': variables,
         'analyses': []
     }
 
+    # Count every pair's contingency table in one pass
+    pairs = [
+        (var1, var2)
+        for i, var1 in enumerate(variables)
+        for var2 in variables[i+1:]
+        if var1 in service.df.columns and var2 in service.df.columns
+    ]
+    service.compute_contingency_tables(pairs)
+
     # Analyze all pairs
     for i, var1 in enumerate(variables):
         for var2 in variables[i+1:]:
             analysis = {
                 'pair': [var1, var2],
-                'crosstab': service.get_cross_tabulation(var1, var2),
-                'chi_square': service.chi_square_test(var1, var2)
+                'crosstab': service.get_cross_tabulation(var1, var2, max_rows, max_cols),
+                'chi_square': service.chi_square_test(var1, var2, max_rows, max_cols)
             }
             results['analyses'].append(analysis)
 
@@ -125,15 +236,40 @@ def analyze_correlation():
     return jsonify(results)
 
 
+@analytics_bp.route('/association-matrix', methods=['GET'])
+@jwt_required()
+def get_association_matrix():
+    """
+    Compact k x k association matrix (Cramér's V, p-values, Theil's U).
+    Fetch /crosstab for the full table of a single pair.
+    """
+    collection = request.args.get('collection')
+    variables = [v.strip() for v in request.args.get('variables', '').split(',') if v.strip()]
+    if not variables:
+        variables = list(ASSOCIATION_VARIABLES)
+
+    if len(variables) < 2:
+        return jsonify({'error': 'At least 2 variables required'}), 400
+
+    service = get_analytics_service(collection, _request_filters())
+    if service is None:
+        return jsonify({'error': 'No artifacts found'}), 404
+
+    result = service.get_association_matrix(list(dict.fromkeys(variables)))
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return jsonify(result)
+
+
 @analytics_bp.route('/compare-collections', methods=['GET'])
 @jwt_required()
 def compare_collections():
     """Compare characteristics between collections."""
-    artifacts_data = get_artifacts_data()
-    if not artifacts_data:
+    service = get_analytics_service(filters=_request_filters())
+    if service is None:
         return jsonify({'error': 'No artifacts found'}), 404
 
-    service = AnalyticsService(artifacts_data)
     comparison = service.compare_collections()
 
     return jsonify(comparison)
@@ -145,11 +281,10 @@ def analyze_materials():
     """Get detailed material analysis."""
     collection = request.args.get('collection')
 
-    artifacts_data = get_artifacts_data(collection)
-    if not artifacts_data:
+    service = get_analytics_service(collection, _request_filters())
+    if service is None:
         return jsonify({'error': 'No artifacts found'}), 404
 
-    service = AnalyticsService(artifacts_data)
     analysis = service.get_material_analysis()
 
     return jsonify(analysis)
@@ -161,27 +296,47 @@ def analyze_chronology():
     """Get chronological analysis."""
     collection = request.args.get('collection')
 
-    artifacts_data = get_artifacts_data(collection)
-    if not artifacts_data:
+    service = get_analytics_service(collection, _request_filters())
+    if service is None:
         return jsonify({'error': 'No artifacts found'}), 404
 
-    service = AnalyticsService(artifacts_data)
     analysis = service.get_chronological_analysis()
 
     return jsonify(analysis)
 
 
+@analytics_bp.route('/numeric/<variable>', methods=['GET'])
+@jwt_required()
+def get_numeric_summary(variable):
+    """Quantiles and histogram of a parsed measurement (max_dimension_mm, weight_g)."""
+    collection = request.args.get('collection')
+    bins = request.args.get('bins', 20, type=int)
+    scale = request.args.get('scale', 'linear')
+    group_by = request.args.get('group_by') or None
+
+    service = get_analytics_service(collection, _request_filters())
+    if service is None:
+        return jsonify({'error': 'No artifacts found'}), 404
+
+    result = service.get_numeric_summary(variable, bins=bins, scale=scale, group_by=group_by)
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return jsonify(result)
+
+
 @analytics_bp.route('/export/excel', methods=['GET'])
 @jwt_required()
 def export_excel():
     """Export analytics report to Excel format."""
     collection = request.args.get('collection')
 
-    artifacts_data = get_artifacts_data(collection)
-    if not artifacts_data:
+    service = get_analytics_service(collection, _request_filters())
+    if service is None:
         return jsonify({'error': 'No artifacts found'}), 404
 
-    service = AnalyticsService(artifacts_data)
+    from ...services.export_service import generate_excel_report
+
     report = service.generate_comprehensive_report()
 
     excel_file = generate_excel_report(report)
@@ -204,11 +359,12 @@ def export_docx():
     """Export analytics report to Word document format."""
     collection = request.args.get('collection')
 
-    artifacts_data = get_artifacts_data(collection)
-    if not artifacts_data:
+    service = get_analytics_service(collection, _request_filters())
+    if service is None:
         return jsonify({'error': 'No artifacts found'}), 404
 
-    service = AnalyticsService(artifacts_data)
+    from ...services.export_service import generate_docx_report
+
     report = service.generate_comprehensive_report()
 
     docx_file = generate_docx_report(report)
@@ -225,6 +381,99 @@ def export_docx():
     )
 
 
+# === BACKGROUND JOBS ===
+# Reports and exports run by `flask worker`; results are downloaded once finished
+
+ANALYTICS_JOB_FORMATS = {
+    'json': 'analytics_report',
+    'excel': 'analytics_excel',
+    'docx': 'analytics_docx'
+}
+
+
+@analytics_bp.route('/export/<fmt>/jobs', methods=['POST'])
+@jwt_required()
+def submit_analytics_job(fmt):
+    """Queue a comprehensive report (json) or report export (excel, docx)."""
+    kind = ANALYTICS_JOB_FORMATS.get(fmt)
+    if not kind:
+        return jsonify({'error': f'Unknown export format: {fmt}'}), 404
+
+    data = request.get_json(silent=True) or {}
+    params = {
+        'collection': data.get('collection', request.args.get('collection')),
+        'filters': normalize_search_params({**request.args.to_dict(), **data})
+    }
+
+    try:
+        priority = parse_priority(data.get('priority', 0))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    job = enqueue(kind, params, user_id=get_jwt_identity(), priority=priority)
+    return jsonify(job.to_dict()), 202
+
+
+@analytics_bp.route('/export/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_analytics_job(job_id):
+    """Get analytics job status and progress."""
+    return job_status_response(job_id, 'analytics_')
+
+
+@analytics_bp.route('/export/jobs/<job_id>/download', methods=['GET'])
+@jwt_required()
+def download_analytics_job(job_id):
+    """Download the result of a finished analytics job."""
+    return job_download_response(job_id, 'analytics_')
+
+
+def _report_for_job(params, progress):
+    collection = params.get('collection')
+    service = get_analytics_service(collection, params.get('filters'))
+    if service is None:
+        raise ValueError('No artifacts found')
+    progress(20)
+    report = service.generate_comprehensive_report()
+    progress(70)
+    return collection, report
+
+
+def _job_filename(collection, extension):
+    prefix = f"{collection}_analytics" if collection else "museum_analytics"
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+
+@job_handler('analytics_report')
+def _run_report_job(params, progress):
+    collection, report = _report_for_job(params, progress)
+    return _job_filename(collection, 'json'), 'application/json', json.dumps(report, default=str).encode('utf-8')
+
+
+@job_handler('analytics_excel')
+def _run_excel_job(params, progress):
+    from ...services.export_service import generate_excel_report
+
+    collection, report = _report_for_job(params, progress)
+    return (
+        _job_filename(collection, 'xlsx'),
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        generate_excel_report(report)
+    )
+
+
+@job_handler('analytics_docx')
+def _run_docx_job(params, progress):
+    from ...services.export_service import generate_docx_report
+
+    collection, report = _report_for_job(params, progress)
+    return (
+        _job_filename(collection, 'docx'),
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        generate_docx_report(report)
+    )
+
+
 @analytics_bp.route('/variables', methods=['GET'])
 @jwt_required()
 def get_available_variables():
@@ -239,6 +488,10 @@ def get_available_variables():
             {'id': 'production_place', 'name': 'Production Place', 'description': 'Place of manufacture'},
             {'id': 'on_display', 'name': 'Display Status', 'description': 'Currently on display'}
         ],
+        'numeric': [
+            {'id': 'max_dimension_mm', 'name': 'Maximum Dimension', 'description': 'Largest dimension in mm, parsed from the size text'},
+            {'id': 'weight_g', 'name': 'Weight', 'description': 'Weight in grams, parsed from the weight text'}
+        ],
         'suggested_correlations': [
             {'var1': 'collection', 'var2': 'material', 'description': 'Compare materials across collections'},
             {'var1': 'collection', 'var2': 'object_type', 'description': 'Compare object types across collections'},
@@ -1,11 +1,14 @@
-from flask import request, jsonify, send_file, current_app
+from flask import request, jsonify, send_file, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import or_
+import csv
 import io
+import tempfile
+from typing import Iterator
 from . import export_bp
-from ...models import Artifact
-from ...services.pdf_service import PDFService
+from ...models import Artifact, Media
 from ...services.zip_service import ZipService
+from ...services.job_service import enqueue, job_handler, parse_priority, job_status_response, job_download_response
 from ..auth.decorators import admin_required
 
 
@@ -20,25 +23,41 @@ def export_pdf():
     query = data.get('query')
     filters = data.get('filters', {})
 
-    artifacts = _get_artifacts_for_export(artifact_ids, query, filters)
+    # Image quality preset: 'screen' or 'print'
+    quality = data.get('quality')
+    if quality and quality not in current_app.config['PDF_IMAGE_PRESETS']:
+        return jsonify({'error': f'Unknown quality preset: {quality}'}), 400
+
+    include_images = data.get('include_images', True)
+    artifacts, media = _get_export_selection(artifact_ids, query, filters, include_media=include_images)
 
     if not artifacts:
         return jsonify({'error': 'No artifacts to export'}), 400
 
+    # Rendered to a temporary file on disk and streamed from there
+    output = tempfile.TemporaryFile()
     try:
+        # reportlab is only loaded by the processes that render PDFs
+        from ...services.pdf_service import PDFService
+
         pdf_service = PDFService()
-        pdf_bytes = pdf_service.generate_artifact_pdf(
+        pdf_service.write_artifact_pdf(
+            output,
             artifacts,
-            include_images=data.get('include_images', True)
+            include_images=include_images,
+            quality=quality,
+            media=media
         )
+        output.seek(0)
 
         return send_file(
-            io.BytesIO(pdf_bytes),
+            output,
             mimetype='application/pdf',
             as_attachment=True,
             download_name='museum_collection_export.pdf'
         )
     except Exception as e:
+        output.close()
         current_app.logger.error(f'PDF export error: {str(e)}')
         return jsonify({'error': 'Export failed'}), 500
 
@@ -54,98 +73,381 @@ def export_zip():
     query = data.get('query')
     filters = data.get('filters', {})
 
-    artifacts = _get_artifacts_for_export(artifact_ids, query, filters)
+    artifacts, media = _get_export_selection(artifact_ids, query, filters)
 
     if not artifacts:
         return jsonify({'error': 'No artifacts to export'}), 400
 
     try:
         zip_service = ZipService()
-        zip_bytes = zip_service.create_zip(
-            artifacts,
-            include_metadata=data.get('include_metadata', True)
-        )
-
-        return send_file(
-            io.BytesIO(zip_bytes),
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name='museum_collection_export.zip'
-        )
     except Exception as e:
         current_app.logger.error(f'ZIP export error: {str(e)}')
         return jsonify({'error': 'Export failed'}), 500
 
+    def generate():
+        # Headers are already sent: a failure can only cut the download short
+        try:
+            yield from zip_service.stream_zip(
+                artifacts,
+                include_metadata=data.get('include_metadata', True),
+                media=media
+            )
+        except Exception as e:
+            current_app.logger.error(f'ZIP export error: {str(e)}')
+            raise
+
+    # Sent chunked as entries are written; the size is not known in advance
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/zip',
+        headers={'Content-Disposition': 'attachment; filename=museum_collection_export.zip'}
+    )
+
 
 @export_bp.route('/csv', methods=['POST'])
 @admin_required
 def export_csv():
     """Export artifacts as CSV (admin only)"""
-    data = request.get_json()
+    return _stream_delimited(request.get_json() or {}, ',', 'text/csv', 'museum_collection_export.csv')
 
-    # Get artifacts to export
-    artifact_ids = data.get('artifact_ids', [])
-    query = data.get('query')
-    filters = data.get('filters', {})
 
-    artifacts = _get_artifacts_for_export(artifact_ids, query, filters)
+@export_bp.route('/tsv', methods=['POST'])
+@admin_required
+def export_tsv():
+    """Export artifacts as tab-separated values (admin only)"""
+    return _stream_delimited(
+        request.get_json() or {}, '\t', 'text/tab-separated-values', 'museum_collection_export.tsv'
+    )
 
-    if not artifacts:
-        return jsonify({'error': 'No artifacts to export'}), 400
 
+def _stream_delimited(data, delimiter, mimetype, filename):
+    """Stream the artifacts matching the request as delimited text"""
     try:
-        import csv
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Header
-        headers = [
-            'Sequence Number', 'Accession Number', 'Other Accession Number',
-            'On Display', 'Object Type', 'Material', 'Size/Dimensions',
-            'Weight', 'Technique', 'Description (Catalogue)',
-            'Description (Observation)', 'Inscription', 'Findspot',
-            'Production Place', 'Chronology', 'Bibliography', 'Remarks'
-        ]
-        writer.writerow(headers)
-
-        # Data
-        for artifact in artifacts:
-            writer.writerow([
-                artifact.sequence_number,
-                artifact.accession_number,
-                artifact.other_accession_number,
-                'Yes' if artifact.on_display else 'No',
-                artifact.object_type,
-                artifact.material,
-                artifact.size_dimensions,
-                artifact.weight,
-                artifact.technique,
-                artifact.description_catalogue,
-                artifact.description_observation,
-                artifact.inscription,
-                artifact.findspot,
-                artifact.production_place,
-                artifact.chronology,
-                artifact.bibliography,
-                artifact.remarks
-            ])
+        dialect = _csv_dialect(data, delimiter)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    q = _export_query(data.get('artifact_ids', []), data.get('query'), data.get('filters', {}))
+    if q.first() is None:
+        return jsonify({'error': 'No artifacts to export'}), 400
+
+    def generate():
+        # Headers are already sent: a failure can only cut the download short
+        try:
+            yield from _iter_csv(q, **dialect)
+        except Exception as e:
+            current_app.logger.error(f'CSV export error: {str(e)}')
+            raise
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+CSV_HEADERS = [
+    'Sequence Number', 'Accession Number', 'Other Accession Number',
+    'On Display', 'Object Type', 'Material', 'Size/Dimensions',
+    'Weight', 'Technique', 'Description (Catalogue)',
+    'Description (Observation)', 'Inscription', 'Findspot',
+    'Production Place', 'Chronology', 'Bibliography', 'Remarks'
+]
+
+CSV_QUOTING = {
+    'minimal': csv.QUOTE_MINIMAL,
+    'all': csv.QUOTE_ALL,
+    'nonnumeric': csv.QUOTE_NONNUMERIC
+}
+
+CSV_LINE_TERMINATORS = {'crlf': '\r\n', 'lf': '\n'}
+
+# Rows fetched per round trip from the server-side cursor, and per yielded chunk
+CSV_BATCH_SIZE = 500
+
+
+def _csv_dialect(data, delimiter=',') -> dict:
+    """Validate the dialect options of an export request.
+
+    Options: 'delimiter' (one character, CSV only), 'quoting' (minimal, all
+    or nonnumeric), 'line_terminator' (crlf or lf) and 'bom' (prefix a UTF-8
+    BOM, which Excel needs to detect the encoding).
+    """
+    if delimiter == ',':
+        delimiter = data.get('delimiter') or ','
+        if not isinstance(delimiter, str) or len(delimiter) != 1 or delimiter in '"\r\n':
+            raise ValueError('delimiter must be a single character')
+
+    quoting = data.get('quoting') or 'minimal'
+    if quoting not in CSV_QUOTING:
+        raise ValueError(f"quoting must be one of: {', '.join(CSV_QUOTING)}")
+
+    line_terminator = data.get('line_terminator') or 'crlf'
+    if line_terminator not in CSV_LINE_TERMINATORS:
+        raise ValueError(f"line_terminator must be one of: {', '.join(CSV_LINE_TERMINATORS)}")
+
+    return {
+        'delimiter': delimiter,
+        'quoting': quoting,
+        'line_terminator': line_terminator,
+        'bom': _parse_flag(data.get('bom', False))
+    }
+
+
+def _parse_flag(value) -> bool:
+    """JSON booleans as they are; strings such as 'true', '1' or 'yes' are true"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('true', '1', 'yes')
+
+
+def _iter_csv(q, delimiter=',', quoting='minimal', line_terminator='crlf', bom=False,
+              progress=None) -> Iterator[bytes]:
+    """Render the artifacts of a query as delimited text, one encoded chunk per batch
+
+    Rows come from a server-side cursor (yield_per), so only one batch of
+    artifacts and one chunk of text are held at a time.
+    """
+    total = q.order_by(None).count() if progress else 0
+    buffer = io.StringIO()
+    writer = csv.writer(
+        buffer,
+        delimiter=delimiter,
+        quoting=CSV_QUOTING[quoting],
+        lineterminator=CSV_LINE_TERMINATORS[line_terminator]
+    )
+
+    def flush() -> bytes:
+        chunk = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    if bom:
+        buffer.write('\ufeff')
+    writer.writerow(CSV_HEADERS)
+
+    # Data
+    for i, artifact in enumerate(q.yield_per(CSV_BATCH_SIZE), 1):
+        writer.writerow([
+            artifact.sequence_number,
+            artifact.accession_number,
+            artifact.other_accession_number,
+            'Yes' if artifact.on_display else 'No',
+            artifact.object_type,
+            artifact.material,
+            artifact.size_dimensions,
+            artifact.weight,
+            artifact.technique,
+            artifact.description_catalogue,
+            artifact.description_observation,
+            artifact.inscription,
+            artifact.findspot,
+            artifact.production_place,
+            artifact.chronology,
+            artifact.bibliography,
+            artifact.remarks
+        ])
+        if i % CSV_BATCH_SIZE == 0:
+            yield flush()
+            if progress:
+                progress(i / total * 100)
+
+    yield flush()
+
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
 
+
+@export_bp.route('/xlsx', methods=['POST'])
+@admin_required
+def export_xlsx():
+    """Export the full catalogue as an Excel workbook (admin only)
+
+    One sheet per collection with every artifact column, media count and
+    primary image, plus a sheet listing the media files.
+    """
+    from ...services.xlsx_service import write_catalogue_xlsx
+
+    data = request.get_json() or {}
+    q = _export_query(data.get('artifact_ids', []), data.get('query'), data.get('filters', {}))
+    if q.first() is None:
+        return jsonify({'error': 'No artifacts to export'}), 400
+
+    # Written to a temporary file on disk and streamed from there
+    output = tempfile.TemporaryFile()
+    try:
+        write_catalogue_xlsx(output, q)
         output.seek(0)
+
         return send_file(
-            io.BytesIO(output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
+            output,
+            mimetype=XLSX_MIMETYPE,
             as_attachment=True,
-            download_name='museum_collection_export.csv'
+            download_name='museum_collection_export.xlsx'
         )
     except Exception as e:
-        current_app.logger.error(f'CSV export error: {str(e)}')
+        output.close()
+        current_app.logger.error(f'Excel export error: {str(e)}')
         return jsonify({'error': 'Export failed'}), 500
 
 
+# === BACKGROUND JOBS ===
+# Same exports run by `flask worker`; results are downloaded once finished
+
+EXPORT_JOB_FORMATS = {
+    'pdf': 'export_pdf',
+    'zip': 'export_zip',
+    'csv': 'export_csv',
+    'tsv': 'export_tsv',
+    'xlsx': 'export_xlsx'
+}
+
+
+@export_bp.route('/<fmt>/jobs', methods=['POST'])
+@admin_required
+def submit_export_job(fmt):
+    """Queue an export as a background job (admin only)"""
+    kind = EXPORT_JOB_FORMATS.get(fmt)
+    if not kind:
+        return jsonify({'error': f'Unknown export format: {fmt}'}), 404
+
+    data = request.get_json() or {}
+    quality = data.get('quality')
+    if quality and quality not in current_app.config['PDF_IMAGE_PRESETS']:
+        return jsonify({'error': f'Unknown quality preset: {quality}'}), 400
+    dialect = None
+    if fmt in ('csv', 'tsv'):
+        try:
+            dialect = _csv_dialect(data, '\t' if fmt == 'tsv' else ',')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    params = {
+        'artifact_ids': data.get('artifact_ids', []),
+        'query': data.get('query'),
+        'filters': data.get('filters', {}),
+        'include_images': data.get('include_images', True),
+        'include_metadata': data.get('include_metadata', True),
+        'quality': quality,
+        'dialect': dialect
+    }
+
+    try:
+        priority = parse_priority(data.get('priority', 0))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    job = enqueue(kind, params, user_id=get_jwt_identity(), priority=priority)
+    return jsonify(job.to_dict()), 202
+
+
+@export_bp.route('/jobs/<job_id>', methods=['GET'])
+@admin_required
+def get_export_job(job_id):
+    """Get export job status and progress"""
+    return job_status_response(job_id, 'export_')
+
+
+@export_bp.route('/jobs/<job_id>/download', methods=['GET'])
+@admin_required
+def download_export_job(job_id):
+    """Download the result of a finished export job"""
+    return job_download_response(job_id, 'export_')
+
+
+def _selection_for_job(params, include_media=True):
+    artifacts, media = _get_export_selection(
+        params.get('artifact_ids', []), params.get('query'), params.get('filters', {}),
+        include_media=include_media
+    )
+    if not artifacts:
+        raise ValueError('No artifacts to export')
+    return artifacts, media
+
+
+@job_handler('export_pdf')
+def _run_pdf_job(params, progress):
+    from ...services.pdf_service import PDFService
+
+    include_images = params.get('include_images', True)
+    artifacts, media = _selection_for_job(params, include_media=include_images)
+    output = tempfile.TemporaryFile()
+    PDFService().write_artifact_pdf(
+        output,
+        artifacts,
+        include_images=include_images,
+        progress=progress,
+        quality=params.get('quality'),
+        media=media
+    )
+    return 'museum_collection_export.pdf', 'application/pdf', output
+
+
+@job_handler('export_zip')
+def _run_zip_job(params, progress):
+    artifacts, media = _selection_for_job(params)
+    chunks = ZipService().stream_zip(
+        artifacts,
+        include_metadata=params.get('include_metadata', True),
+        progress=progress,
+        media=media
+    )
+    return 'museum_collection_export.zip', 'application/zip', chunks
+
+
+def _delimited_job(params, progress, delimiter):
+    q = _export_query(params.get('artifact_ids', []), params.get('query'), params.get('filters', {}))
+    if q.first() is None:
+        raise ValueError('No artifacts to export')
+    dialect = params.get('dialect') or _csv_dialect({}, delimiter)
+    return _iter_csv(q, progress=progress, **dialect)
+
+
+@job_handler('export_csv')
+def _run_csv_job(params, progress):
+    return 'museum_collection_export.csv', 'text/csv', _delimited_job(params, progress, ',')
+
+
+@job_handler('export_tsv')
+def _run_tsv_job(params, progress):
+    chunks = _delimited_job(params, progress, '\t')
+    return 'museum_collection_export.tsv', 'text/tab-separated-values', chunks
+
+
+@job_handler('export_xlsx')
+def _run_xlsx_job(params, progress):
+    from ...services.xlsx_service import write_catalogue_xlsx
+
+    q = _export_query(params.get('artifact_ids', []), params.get('query'), params.get('filters', {}))
+    if q.first() is None:
+        raise ValueError('No artifacts to export')
+    output = tempfile.TemporaryFile()
+    write_catalogue_xlsx(output, q, progress)
+    return 'museum_collection_export.xlsx', XLSX_MIMETYPE, output
+
+
 def _get_artifacts_for_export(artifact_ids, query, filters):
     """Helper to get artifacts based on IDs, query, or filters"""
+    return _export_query(artifact_ids, query, filters).all()
+
+
+def _get_export_selection(artifact_ids, query, filters, include_media=True):
+    """Artifacts to export and their media, preloaded as artifact id -> media list
+
+    The media of the whole selection is loaded in one query, so exports
+    issue the same number of queries however many artifacts they contain.
+    media is None when include_media is false.
+    """
+    artifacts = _get_artifacts_for_export(artifact_ids, query, filters)
+    media = Media.by_artifact(a.id for a in artifacts) if include_media and artifacts else None
+    return artifacts, media
+
+
+def _export_query(artifact_ids, query, filters):
+    """Query selecting the artifacts to export, by IDs, query, or filters"""
     if artifact_ids:
-        return Artifact.query.filter(Artifact.id.in_(artifact_ids)).all()
+        return Artifact.query.filter(Artifact.id.in_(artifact_ids))
 
     q = Artifact.query
 
@@ -166,4 +468,4 @@ def _get_artifacts_for_export(artifact_ids, query, filters):
     if filters.get('on_display') is not None:
         q = q.filter_by(on_display=filters['on_display'])
 
-    return q.order_by(Artifact.sequence_number).all()
+    return q.order_by(Artifact.sequence_number)
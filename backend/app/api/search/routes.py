@@ -1,9 +1,9 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
-from sqlalchemy import or_
 from . import search_bp
 from ...models import Artifact
 from ...extensions import db
+from ...services.search_service import normalize_search_params, search_conditions
 
 
 def _can_view_internal():
@@ -24,38 +24,9 @@ def search_artifacts():
 
     query = Artifact.query
 
-    # Full-text search
+    # Full-text search and filters
     q = request.args.get('q')
-    if q:
-        search_term = f'%{q}%'
-        query = query.filter(or_(
-            Artifact.sequence_number.ilike(search_term),
-            Artifact.accession_number.ilike(search_term),
-            Artifact.object_type.ilike(search_term),
-            Artifact.material.ilike(search_term),
-            Artifact.description_catalogue.ilike(search_term),
-            Artifact.description_observation.ilike(search_term),
-            Artifact.inscription.ilike(search_term),
-            Artifact.findspot.ilike(search_term),
-            Artifact.remarks.ilike(search_term)
-        ))
-
-    # Filters
-    object_type = request.args.get('object_type')
-    if object_type:
-        query = query.filter(Artifact.object_type.ilike(f'%{object_type}%'))
-
-    material = request.args.get('material')
-    if material:
-        query = query.filter(Artifact.material.ilike(f'%{material}%'))
-
-    on_display = request.args.get('on_display')
-    if on_display is not None:
-        query = query.filter_by(on_display=on_display.lower() == 'true')
-
-    chronology = request.args.get('chronology')
-    if chronology:
-        query = query.filter(Artifact.chronology.ilike(f'%{chronology}%'))
+    query = query.filter(*search_conditions(normalize_search_params(request.args)))
 
     # Sorting
     sort_by = request.args.get('sort_by', 'sequence_number')
@@ -1,68 +1,98 @@
-from flask import jsonify
+from datetime import date
+from flask import jsonify, request
 from flask_jwt_extended import jwt_required
-from sqlalchemy import func, case, and_
+from sqlalchemy import func, case, and_, select, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from . import stats_bp
 from ...models import Artifact, Media, Annotation, User, Submission
+from ...models.artifact import COMPLETENESS_FIELDS
 from ...extensions import db
+from ...services.stats_service import get_snapshot
+from ...services.timeline_service import get_timeline, GRANULARITIES
+from ...services.search_service import normalize_search_params, search_conditions
+
+
+def _wants_fresh():
+    """Check if the caller asked to bypass the stats snapshot"""
+    return request.args.get('fresh', 'false').lower() == 'true'
 
 
 @stats_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
 def get_dashboard_stats():
     """Get dashboard statistics"""
-    # Collection stats
-    total_artifacts = Artifact.query.count()
-    on_display = Artifact.query.filter_by(on_display=True).count()
-    total_media = Media.query.count()
-    total_annotations = Annotation.query.count()
-
-    # User stats
-    total_users = User.query.filter_by(is_active=True).count()
-
-    # Submission stats
-    pending_submissions = Submission.query.filter_by(status='pending').count()
-
-    # Object type distribution
-    object_type_stats = db.session.query(
-        Artifact.object_type,
-        func.count(Artifact.id)
-    ).group_by(Artifact.object_type).filter(
-        Artifact.object_type.isnot(None)
-    ).order_by(func.count(Artifact.id).desc()).limit(10).all()
-
-    # Material distribution
-    material_stats = db.session.query(
-        Artifact.material,
-        func.count(Artifact.id)
-    ).group_by(Artifact.material).filter(
-        Artifact.material.isnot(None)
-    ).order_by(func.count(Artifact.id).desc()).limit(10).all()
-
-    return jsonify({
+    return jsonify(get_snapshot('dashboard', None, _build_dashboard_stats, fresh=_wants_fresh()))
+
+
+def _top_values_json(column, limit=10):
+    """Scalar subquery returning the top values of a column as a JSON array"""
+    counts = db.session.query(
+        column.label('name'),
+        func.count().label('count')
+    ).filter(
+        column.isnot(None)
+    ).group_by(column).order_by(func.count().desc()).limit(limit).subquery()
+
+    return select(
+        func.coalesce(
+            func.json_agg(aggregate_order_by(
+                func.json_build_object('name', counts.c.name, 'count', counts.c['count']),
+                counts.c['count'].desc()
+            )),
+            text("'[]'::json")
+        )
+    ).scalar_subquery()
+
+
+def _build_dashboard_stats():
+    """Compute dashboard statistics from the live tables in one statement"""
+    totals = db.session.query(
+        # Collection stats
+        func.count(Artifact.id).label('artifacts'),
+        func.count(Artifact.id).filter(Artifact.on_display == True).label('on_display'),
+        select(func.count(Media.id)).scalar_subquery().label('media'),
+        select(func.count(Annotation.id)).scalar_subquery().label('annotations'),
+        # User stats
+        select(func.count(User.id)).where(User.is_active == True).scalar_subquery().label('users'),
+        # Submission stats
+        select(func.count(Submission.id)).where(
+            Submission.status == 'pending'
+        ).scalar_subquery().label('pending_submissions'),
+        # Object type and material distributions
+        _top_values_json(Artifact.object_type).label('object_types'),
+        _top_values_json(Artifact.material).label('materials')
+    ).select_from(Artifact).one()
+
+    return {
         'totals': {
-            'artifacts': total_artifacts,
-            'on_display': on_display,
-            'not_on_display': total_artifacts - on_display,
-            'media': total_media,
-            'annotations': total_annotations,
-            'users': total_users,
-            'pending_submissions': pending_submissions
+            'artifacts': totals.artifacts,
+            'on_display': totals.on_display,
+            'not_on_display': totals.artifacts - totals.on_display,
+            'media': totals.media,
+            'annotations': totals.annotations,
+            'users': totals.users,
+            'pending_submissions': totals.pending_submissions
         },
         'object_types': [
-            {'name': t[0] or 'Unknown', 'count': t[1]}
-            for t in object_type_stats
+            {'name': t['name'] or 'Unknown', 'count': t['count']}
+            for t in totals.object_types
         ],
         'materials': [
-            {'name': m[0] or 'Unknown', 'count': m[1]}
-            for m in material_stats
+            {'name': m['name'] or 'Unknown', 'count': m['count']}
+            for m in totals.materials
         ]
-    })
+    }
 
 
 @stats_bp.route('/collection', methods=['GET'])
 @jwt_required()
 def get_collection_stats():
     """Get detailed collection statistics"""
+    return jsonify(get_snapshot('collection', None, _build_collection_stats, fresh=_wants_fresh()))
+
+
+def _build_collection_stats():
+    """Compute detailed collection statistics from the live tables"""
     # Artifacts with images
     artifacts_with_images = db.session.query(
         func.count(func.distinct(Media.artifact_id))
@@ -99,7 +129,7 @@ def get_collection_stats():
         Artifact.findspot.isnot(None)
     ).order_by(func.count(Artifact.id).desc()).limit(10).all()
 
-    return jsonify({
+    return {
         'coverage': {
             'with_images': artifacts_with_images,
             'with_annotations': artifacts_with_annotations,
@@ -113,18 +143,25 @@ def get_collection_stats():
             {'name': f[0] or 'Unknown', 'count': f[1]}
             for f in findspot_stats
         ]
-    })
+    }
 
 
 @stats_bp.route('/catalog', methods=['GET'])
 @jwt_required()
 def get_catalog_stats():
     """Get comprehensive statistics for catalog/publication"""
-    from flask import request
-
     # Collection filter
     collection = request.args.get('collection')
 
+    return jsonify(get_snapshot(
+        'catalog', collection,
+        lambda: _build_catalog_stats(collection),
+        fresh=_wants_fresh()
+    ))
+
+
+def _build_catalog_stats(collection):
+    """Compute catalog statistics from the live tables"""
     # Base queries
     artifact_query = Artifact.query
     if collection:
@@ -133,20 +170,24 @@ def get_catalog_stats():
     # === TOTALS ===
     total_artifacts = artifact_query.count()
 
-    # Get artifact IDs for this collection to filter media
+    # Media and annotations are scoped by joining back to their artifact, so the
+    # collection filter stays inside the statement instead of an ID list
+    media_query = Media.query
     if collection:
-        artifact_ids = [a.id for a in artifact_query.with_entities(Artifact.id).all()]
-        media_query = Media.query.filter(Media.artifact_id.in_(artifact_ids)) if artifact_ids else Media.query.filter(False)
-    else:
-        media_query = Media.query
+        media_query = media_query.join(
+            Artifact, Media.artifact_id == Artifact.id
+        ).filter(Artifact.collection == collection)
 
     total_media = media_query.count()
 
     # Annotations for this collection's media
-    if collection and artifact_ids:
-        annotation_query = Annotation.query.join(Media).filter(Media.artifact_id.in_(artifact_ids))
-    else:
-        annotation_query = Annotation.query
+    annotation_query = Annotation.query
+    if collection:
+        annotation_query = annotation_query.join(
+            Media, Annotation.media_id == Media.id
+        ).join(
+            Artifact, Media.artifact_id == Artifact.id
+        ).filter(Artifact.collection == collection)
     total_annotations = annotation_query.count()
 
     # === DISPLAY STATUS ===
@@ -154,14 +195,14 @@ def get_catalog_stats():
     in_storage = total_artifacts - on_display
 
     # === PHOTO COVERAGE ===
+    artifacts_with_images_query = db.session.query(
+        func.count(func.distinct(Media.artifact_id))
+    )
     if collection:
-        artifacts_with_images = db.session.query(
-            func.count(func.distinct(Media.artifact_id))
-        ).filter(Media.artifact_id.in_(artifact_ids)).scalar() or 0 if artifact_ids else 0
-    else:
-        artifacts_with_images = db.session.query(
-            func.count(func.distinct(Media.artifact_id))
-        ).scalar() or 0
+        artifacts_with_images_query = artifacts_with_images_query.join(
+            Artifact, Media.artifact_id == Artifact.id
+        ).filter(Artifact.collection == collection)
+    artifacts_with_images = artifacts_with_images_query.scalar() or 0
     artifacts_without_images = total_artifacts - artifacts_with_images
 
     # Artifacts needing photos (no images)
@@ -171,30 +212,21 @@ def get_catalog_stats():
     missing_photos = missing_photos_query.all()
 
     # === DOCUMENTATION COMPLETENESS ===
-    # Count how many key fields are filled per artifact
-    completeness_fields = [
-        'accession_number', 'object_type', 'material', 'size_dimensions',
-        'description_observation', 'chronology', 'findspot'
-    ]
-
-    # Calculate average completeness
-    artifacts_all = artifact_query.all()
-    total_completeness = 0
-    completeness_distribution = {'complete': 0, 'partial': 0, 'minimal': 0}
-
-    for artifact in artifacts_all:
-        filled = sum(1 for f in completeness_fields if getattr(artifact, f))
-        pct = (filled / len(completeness_fields)) * 100
-        total_completeness += pct
-
-        if pct >= 80:
-            completeness_distribution['complete'] += 1
-        elif pct >= 40:
-            completeness_distribution['partial'] += 1
-        else:
-            completeness_distribution['minimal'] += 1
+    # Uses the completeness score stored on each artifact
+    score = Artifact.completeness_score
+    completeness_query = db.session.query(
+        func.avg(score),
+        func.count(Artifact.id).filter(score >= 80),
+        func.count(Artifact.id).filter(and_(score >= 40, score < 80)),
+        func.count(Artifact.id).filter(score < 40)
+    )
+    if collection:
+        completeness_query = completeness_query.filter(Artifact.collection == collection)
+    avg_score, complete, partial, minimal = completeness_query.one()
 
-    avg_completeness = total_completeness / total_artifacts if total_artifacts > 0 else 0
+    completeness_fields = COMPLETENESS_FIELDS
+    completeness_distribution = {'complete': complete, 'partial': partial, 'minimal': minimal}
+    avg_completeness = float(avg_score or 0)
 
     # === MATERIALS BREAKDOWN ===
     material_query = db.session.query(
@@ -294,7 +326,7 @@ def get_catalog_stats():
 
 **External Links:** {with_bm_link} artifacts have cross-references with the British Museum Nilgiri collection."""
 
-    return jsonify({
+    return {
         'collection': collection,
         'collection_name': collection_name,
         'narrative': narrative,
@@ -360,4 +392,200 @@ def get_catalog_stats():
         'cross_references': {
             'british_museum': with_bm_link
         }
+    }
+
+
+@stats_bp.route('/worklist', methods=['GET'])
+@jwt_required()
+def get_worklist():
+    """
+    Least-documented artifacts first, paged with a keyset cursor.
+
+    Query params:
+        collection: Restrict to one collection
+        missing: Comma-separated fields that must be empty ('photos' or any
+                 completeness field, e.g. 'photos,chronology')
+        cursor: next_cursor value from the previous page
+        per_page: Page size (1 to 200)
+    """
+    collection = request.args.get('collection')
+    per_page = max(1, min(request.args.get('per_page', 50, type=int), 200))
+
+    has_photos = db.session.query(Media.id).filter(
+        Media.artifact_id == Artifact.id
+    ).exists()
+
+    query = db.session.query(Artifact, has_photos.label('has_photos'))
+    if collection:
+        query = query.filter(Artifact.collection == collection)
+
+    missing = [m.strip() for m in request.args.get('missing', '').split(',') if m.strip()]
+    for field in missing:
+        if field == 'photos':
+            query = query.filter(~has_photos)
+        elif field in COMPLETENESS_FIELDS:
+            column = getattr(Artifact, field)
+            query = query.filter((column.is_(None)) | (column == ''))
+        else:
+            return jsonify({'error': f'Unknown field: {field}'}), 400
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after_score, after_id = cursor.split('|', 1)
+            after_score = float(after_score)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(
+            (Artifact.completeness_score > after_score) |
+            (and_(Artifact.completeness_score == after_score, Artifact.id > after_id))
+        )
+
+    rows = query.order_by(
+        Artifact.completeness_score, Artifact.id
+    ).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1][0]
+        next_cursor = f'{last.completeness_score}|{last.id}'
+
+    return jsonify({
+        'artifacts': [
+            {
+                'id': a.id,
+                'collection': a.collection,
+                'sequence_number': a.sequence_number,
+                'object_type': a.object_type,
+                'completeness_score': a.completeness_score,
+                'missing_fields': a.missing_fields + ([] if photos else ['photos'])
+            }
+            for a, photos in rows
+        ],
+        'next_cursor': next_cursor,
+        'per_page': per_page
+    })
+
+
+@stats_bp.route('/timeline', methods=['GET'])
+@jwt_required()
+def get_activity_timeline():
+    """
+    Artifacts, media and annotations added over time.
+
+    Query params:
+        granularity: day, week or month (default month)
+        collection: Restrict to one collection
+        start, end: Optional ISO date bounds (inclusive)
+    """
+    granularity = request.args.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': f'Granularity must be one of: {", ".join(GRANULARITIES)}'}), 400
+
+    collection = request.args.get('collection')
+
+    try:
+        start = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+
+    periods = get_timeline(granularity, collection, start, end)
+
+    return jsonify({
+        'granularity': granularity,
+        'collection': collection,
+        'periods': periods,
+        'totals': {
+            entity: sum(p[entity] for p in periods)
+            for entity in ('artifact', 'media', 'annotation')
+        }
+    })
+
+
+# Widest histogram a single request may ask for
+MAX_HISTOGRAM_BINS = 500
+
+
+@stats_bp.route('/chronology-histogram', methods=['GET'])
+@jwt_required()
+def get_chronology_histogram():
+    """
+    Dated artifacts per bin of years, computed in SQL from date_start / date_end.
+
+    Query params:
+        bin: Bin width in years (default 100)
+        start, end: Year bounds, negative for BCE (default: the dated range)
+        count: 'overlap' counts an artifact in every bin its range touches
+               (default), 'midpoint' only in the bin of its midpoint
+        collection, q, object_type, material, chronology, on_display,
+        date_from, date_to: Restrict the artifacts as in /api/search
+    """
+    width = request.args.get('bin', 100, type=int)
+    mode = request.args.get('count', 'overlap')
+    if width < 1:
+        return jsonify({'error': 'bin must be a positive number of years'}), 400
+    if mode not in ('overlap', 'midpoint'):
+        return jsonify({'error': 'count must be overlap or midpoint'}), 400
+
+    conditions = search_conditions(normalize_search_params(request.args))
+    collection = request.args.get('collection')
+    if collection:
+        conditions.append(Artifact.collection == collection)
+
+    dated, undated, first, last = db.session.execute(
+        select(
+            func.count().filter(Artifact.date_start.isnot(None)),
+            func.count().filter(Artifact.date_start.is_(None)),
+            func.min(Artifact.date_start),
+            func.max(Artifact.date_end)
+        ).where(*conditions)
+    ).one()
+
+    start = request.args.get('start', first, type=int)
+    end = request.args.get('end', last, type=int)
+    if start is None or end is None or start > end:
+        bins = []
+    else:
+        # Bins are aligned on multiples of the width (floor division also for BCE)
+        first_bin = start // width * width
+        last_bin = end // width * width
+        if (last_bin - first_bin) // width + 1 > MAX_HISTOGRAM_BINS:
+            return jsonify({'error': f'More than {MAX_HISTOGRAM_BINS} bins; use a wider bin or a narrower range'}), 400
+
+        if mode == 'overlap':
+            series = func.generate_series(first_bin, last_bin, width).table_valued('bin_start').render_derived()
+            rows = db.session.execute(
+                select(series.c.bin_start, func.count(Artifact.id)).select_from(series).outerjoin(
+                    Artifact, and_(
+                        Artifact.date_start < series.c.bin_start + width,
+                        Artifact.date_end >= series.c.bin_start,
+                        *conditions
+                    )
+                ).group_by(series.c.bin_start).order_by(series.c.bin_start)
+            ).all()
+        else:
+            midpoint_bin = (func.floor((Artifact.date_start + Artifact.date_end) / 2.0 / width) * width).label('bin_start')
+            counts = dict(db.session.execute(
+                select(midpoint_bin, func.count()).where(
+                    Artifact.date_start.isnot(None), *conditions
+                ).group_by(midpoint_bin)
+            ).all())
+            rows = [
+                (bin_start, counts.get(bin_start, 0))
+                for bin_start in range(first_bin, last_bin + 1, width)
+            ]
+
+        bins = [
+            {'start': int(bin_start), 'end': int(bin_start) + width - 1, 'count': count}
+            for bin_start, count in rows
+        ]
+
+    return jsonify({
+        'bin': width,
+        'count': mode,
+        'bins': bins,
+        'dated': dated,
+        'undated': undated
     })
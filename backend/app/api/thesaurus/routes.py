@@ -98,6 +98,8 @@ def create_term():
         description=data.get('description'),
         alt_terms=','.join(data.get('alt_terms', [])) if isinstance(data.get('alt_terms'), list) else data.get('alt_terms'),
         parent_id=data.get('parent_id'),
+        date_start=data.get('date_start'),
+        date_end=data.get('date_end'),
         sort_order=data.get('sort_order', 0),
         is_active=data.get('is_active', True)
     )
@@ -136,6 +138,12 @@ def update_term(term_id):
     if 'parent_id' in data:
         term.parent_id = data['parent_id']
 
+    if 'date_start' in data:
+        term.date_start = data['date_start']
+
+    if 'date_end' in data:
+        term.date_end = data['date_end']
+
     if 'sort_order' in data:
         term.sort_order = data['sort_order']
 
@@ -196,6 +204,8 @@ def bulk_create_terms():
             term=item['term'],
             description=item.get('description'),
             alt_terms=','.join(item.get('alt_terms', [])) if isinstance(item.get('alt_terms'), list) else item.get('alt_terms'),
+            date_start=item.get('date_start'),
+            date_end=item.get('date_end'),
             sort_order=item.get('sort_order', 0),
             is_active=item.get('is_active', True)
         )
@@ -136,6 +136,274 @@ def import_firenze_command(excel, dropbox_subdir, photos_subpath, dry_run, no_tr
     )
 
 
+@click.command('backfill-completeness')
+@click.option('--batch-size', default=500, help='Artifacts per commit')
+@with_appcontext
+def backfill_completeness_command(batch_size):
+    """Recompute the stored completeness score of every artifact."""
+    from sqlalchemy import bindparam, select
+    from .models.artifact import COMPLETENESS_FIELDS, completeness_score
+    from .services.stats_service import invalidate_snapshots
+
+    table = Artifact.__table__
+    # A recomputed score is not an edit: updated_at is set to itself so
+    # that its onupdate default does not fire
+    stmt = table.update().where(table.c.id == bindparam('artifact_id')).values(
+        completeness_score=bindparam('score'), updated_at=table.c.updated_at
+    )
+    query = select(
+        table.c.id, table.c.completeness_score, *(table.c[f] for f in COMPLETENESS_FIELDS)
+    ).order_by(table.c.id).limit(batch_size)
+
+    updated, last_id = 0, ''
+    while True:
+        rows = db.session.execute(query.where(table.c.id > last_id)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        changes = []
+        for row in rows:
+            score = completeness_score(row)
+            if row.completeness_score != score:
+                changes.append({'artifact_id': row.id, 'score': score})
+        if changes:
+            db.session.execute(stmt, changes)
+            invalidate_snapshots(db.session.connection())
+            updated += len(changes)
+        db.session.commit()
+
+    click.echo(f'Completeness backfill complete: {updated} artifacts updated.')
+
+
+@click.command('backfill-timeline')
+@with_appcontext
+def backfill_timeline_command():
+    """Rebuild the daily activity rollups from the source tables."""
+    from .services.timeline_service import rebuild_rollups
+
+    rows = rebuild_rollups()
+    click.echo(f'Timeline backfill complete: {rows} rollup rows.')
+
+
+@click.command('backfill-chronology')
+@click.option('--batch-size', default=500, help='Artifacts per commit')
+@with_appcontext
+def backfill_chronology_command(batch_size):
+    """Parse every artifact's chronology into date_start / date_end."""
+    from .services.chronology_service import backfill_chronology_dates, undated_chronologies
+
+    updated, dated = backfill_chronology_dates(batch_size)
+    click.echo(f'Chronology backfill complete: {updated} artifacts updated, {dated} dated.')
+
+    undated = undated_chronologies()
+    if undated:
+        click.echo('Most frequent undated chronologies (add them to the thesaurus with a date range):')
+        for value, count in undated:
+            click.echo(f'  - {value}: {count}')
+
+
+@click.command('backfill-measurements')
+@click.option('--batch-size', default=500, help='Artifacts per commit')
+@with_appcontext
+def backfill_measurements_command(batch_size):
+    """Parse every artifact's size and weight into max_dimension_mm / weight_g."""
+    from .services.measurement_service import backfill_measurements, measurement_coverage
+
+    updated = backfill_measurements(batch_size)
+    click.echo(f'Measurement backfill complete: {updated} artifacts updated.')
+
+    for field, counts in measurement_coverage().items():
+        summary = ', '.join(f'{confidence}: {count}' for confidence, count in sorted(counts.items()))
+        click.echo(f'  {field}: {summary or "no values"}')
+
+
+@click.command('worker')
+@click.option('--poll-interval', default=2.0, help='Seconds to wait when the queue is empty')
+@click.option('--once', is_flag=True, help='Exit when no job is due instead of polling')
+@with_appcontext
+def worker_command(poll_interval, once):
+    """Run background jobs (exports, analytics reports)."""
+    from .services.job_service import run_worker
+
+    click.echo('Job worker started. Press Ctrl+C to stop.')
+    try:
+        run_worker(poll_interval=poll_interval, once=once)
+    except KeyboardInterrupt:
+        click.echo('Job worker stopped.')
+
+
+@click.command('bench-stats')
+@click.option('--collection', default='florence_museum', help='Collection for the scoped catalog page')
+@click.option('--runs', default=5, help='Requests per page')
+@with_appcontext
+def bench_stats_command(collection, runs):
+    """Benchmark the stats pages (dashboard, single collection and combined catalog)."""
+    import time
+    from statistics import median
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+
+    app = current_app._get_current_object()
+    client = app.test_client()
+    token = create_access_token(identity='bench-stats', additional_claims={'role': 'admin'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    statements = []
+
+    def count_statement(*args):
+        statements.append(1)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    try:
+        pages = [
+            ('dashboard', '/api/stats/dashboard?fresh=true'),
+            (f'{collection} catalog', f'/api/stats/catalog?collection={collection}&fresh=true'),
+            ('combined catalog', '/api/stats/catalog?fresh=true'),
+        ]
+        click.echo(f"\nStats benchmark ({runs} runs each):")
+        for label, url in pages:
+            timings = []
+            for _ in range(runs):
+                statements.clear()
+                start = time.perf_counter()
+                response = client.get(url, headers=headers)
+                timings.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    click.echo(f"  - {label}: HTTP {response.status_code}")
+                    break
+            else:
+                click.echo(
+                    f"  - {label}: median {median(timings):.1f} ms, "
+                    f"best {min(timings):.1f} ms, {len(statements)} SQL statements"
+                )
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+
+
+@click.command('bench-analytics')
+@click.option('--rows', default=200000, help='Synthetic catalog size')
+@click.option('--seed', default=42, help='Random seed')
+def bench_analytics_command(rows, seed):
+    """Compare string-keyed and categorical analytics frames on a synthetic catalog."""
+    import time
+    import numpy as np
+    import pandas as pd
+    from scipy import stats
+    from .services.analytics_service import AnalyticsService
+
+    rng = np.random.default_rng(seed)
+    cardinalities = {
+        'collection': 3, 'object_type': 400, 'material': 60,
+        'chronology': 120, 'findspot': 900, 'production_place': 150
+    }
+    data = {'id': np.arange(rows).astype(str)}
+    for col, k in cardinalities.items():
+        # Zipf-like skew, as in the real catalog
+        weights = 1 / np.arange(1, k + 1)
+        data[col] = np.array([f'{col} {i}' for i in range(k)], dtype=object)[
+            rng.choice(k, size=rows, p=weights / weights.sum())
+        ]
+    data['on_display'] = rng.random(rows) < 0.3
+    strings = pd.DataFrame(data)
+
+    pairs = [
+        ('collection', 'material'), ('collection', 'object_type'), ('material', 'object_type'),
+        ('chronology', 'material'), ('chronology', 'object_type')
+    ]
+    distributions = ['collection', 'object_type', 'material', 'chronology', 'findspot']
+
+    def run_strings():
+        for var in distributions:
+            strings[var].value_counts()
+        for a, b in pairs:
+            pd.crosstab(strings[a], strings[b], margins=True, margins_name='Total')
+            pd.crosstab(strings[a], strings[b], normalize='all', margins=True, margins_name='Total')
+            stats.chi2_contingency(pd.crosstab(strings[a], strings[b]))
+
+    def run_categorical(service):
+        for var in distributions:
+            service.get_distribution_analysis(var)
+        for a, b in pairs:
+            service.get_cross_tabulation(a, b)
+            service.chi_square_test(a, b)
+
+    start = time.perf_counter()
+    service = AnalyticsService(strings.copy())
+    encode_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    run_strings()
+    strings_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    run_categorical(service)
+    categorical_ms = (time.perf_counter() - start) * 1000
+
+    strings_mb = strings.memory_usage(deep=True).sum() / 2**20
+    categorical_mb = service.df.memory_usage(deep=True).sum() / 2**20
+
+    click.echo(f"\nAnalytics benchmark ({rows} synthetic artifacts):")
+    click.echo(f"  - String frame:      {strings_mb:8.1f} MB, {strings_ms:8.1f} ms")
+    click.echo(f"  - Categorical frame: {categorical_mb:8.1f} MB, {categorical_ms:8.1f} ms (+{encode_ms:.1f} ms encoding)")
+
+
+# Run in a fresh interpreter so the measurement starts from a cold import cache
+STARTUP_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+startup_ms = (time.perf_counter() - start) * 1000
+startup_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+status = app.test_client().get('/api/health').status_code
+health_ms = (time.perf_counter() - start) * 1000
+heavy = [m for m in ('pandas', 'numpy', 'scipy', 'reportlab', 'docx', 'xlsxwriter') if m in sys.modules]
+print(json.dumps({'startup_ms': startup_ms, 'rss': startup_rss, 'health_ms': health_ms,
+                  'status': status, 'heavy': heavy}))
+"""
+
+
+@click.command('bench-startup')
+@click.option('--runs', default=5, help='Cold starts to measure')
+@with_appcontext
+def bench_startup_command(runs):
+    """Measure app start-up time and memory (RSS) in fresh interpreters."""
+    import json
+    import os
+    import subprocess
+    import sys
+    from statistics import median
+
+    backend_dir = os.path.dirname(current_app.root_path)
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    rss_unit = 2**20 if sys.platform == 'darwin' else 2**10
+
+    results = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, '-c', STARTUP_PROBE],
+            cwd=backend_dir, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            click.echo(proc.stderr, err=True)
+            raise click.ClickException('Start-up probe failed')
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    startup = [r['startup_ms'] for r in results]
+    rss = [r['rss'] / rss_unit for r in results]
+    health = [r['health_ms'] for r in results]
+
+    click.echo(f"\nStart-up benchmark ({runs} cold starts):")
+    click.echo(f"  - import + create_app: median {median(startup):.0f} ms, best {min(startup):.0f} ms")
+    click.echo(f"  - peak RSS after start-up: median {median(rss):.1f} MB")
+    click.echo(f"  - first /api/health: median {median(health):.1f} ms (HTTP {results[-1]['status']})")
+    heavy = results[-1]['heavy']
+    click.echo(f"  - heavy modules loaded at start-up: {', '.join(heavy) if heavy else 'none'}")
+
+
 def register_commands(app):
     """Register CLI commands with the app."""
     app.cli.add_command(init_db_command)
@@ -144,3 +412,11 @@ def register_commands(app):
     app.cli.add_command(link_images_command)
     app.cli.add_command(db_stats_command)
     app.cli.add_command(import_firenze_command)
+    app.cli.add_command(backfill_completeness_command)
+    app.cli.add_command(backfill_timeline_command)
+    app.cli.add_command(backfill_chronology_command)
+    app.cli.add_command(backfill_measurements_command)
+    app.cli.add_command(worker_command)
+    app.cli.add_command(bench_stats_command)
+    app.cli.add_command(bench_analytics_command)
+    app.cli.add_command(bench_startup_command)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -35,6 +36,43 @@ class Config:
     # Upload
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB max file size
 
+    # Stats snapshots: minimum seconds between recomputations of a stale snapshot
+    STATS_SNAPSHOT_DEBOUNCE = int(os.environ.get('STATS_SNAPSHOT_DEBOUNCE', 30))
+
+    # Analytics: per-worker cache of prepared frames
+    ANALYTICS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYTICS_CACHE_MAX_ENTRIES', 8))
+    ANALYTICS_CACHE_MAX_MB = int(os.environ.get('ANALYTICS_CACHE_MAX_MB', 256))
+
+    # Background jobs (`flask worker`); results dir must be shared with the web process
+    JOB_RESULTS_DIR = os.environ.get('JOB_RESULTS_DIR', os.path.join(tempfile.gettempdir(), 'museum_jobs'))
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_BACKOFF = int(os.environ.get('JOB_RETRY_BACKOFF', 30))  # seconds, doubled per attempt
+    JOB_HEARTBEAT_INTERVAL = int(os.environ.get('JOB_HEARTBEAT_INTERVAL', 15))  # seconds
+    JOB_LEASE_TIMEOUT = int(os.environ.get('JOB_LEASE_TIMEOUT', 120))  # seconds without heartbeat before requeue
+    JOB_RESULT_TTL_HOURS = int(os.environ.get('JOB_RESULT_TTL_HOURS', 72))
+
+    # Exports: parallel media downloads feeding the ZIP / PDF writers in order
+    EXPORT_FETCH_CONCURRENCY = int(os.environ.get('EXPORT_FETCH_CONCURRENCY', 8))
+    EXPORT_FETCH_QUEUE = int(os.environ.get('EXPORT_FETCH_QUEUE', 16))  # files fetched ahead of the writer
+    EXPORT_FETCH_RETRIES = int(os.environ.get('EXPORT_FETCH_RETRIES', 2))
+    EXPORT_FETCH_RETRY_BACKOFF = float(os.environ.get('EXPORT_FETCH_RETRY_BACKOFF', 0.5))  # seconds, doubled per retry
+
+    # PDF export: images are resampled to their placed size at the preset's DPI
+    PDF_IMAGE_PRESETS = {
+        'screen': {
+            'dpi': int(os.environ.get('PDF_SCREEN_DPI', 110)),
+            'jpeg_quality': int(os.environ.get('PDF_SCREEN_JPEG_QUALITY', 75)),
+        },
+        'print': {
+            'dpi': int(os.environ.get('PDF_PRINT_DPI', 300)),
+            'jpeg_quality': int(os.environ.get('PDF_PRINT_JPEG_QUALITY', 90)),
+        },
+    }
+    PDF_DEFAULT_PRESET = os.environ.get('PDF_DEFAULT_PRESET', 'print')
+    PDF_CHUNK_ARTIFACTS = int(os.environ.get('PDF_CHUNK_ARTIFACTS', 50))  # artifacts laid out per part file
+    PDF_DERIVATIVE_CACHE_DIR = os.environ.get('PDF_DERIVATIVE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'museum_pdf_derivatives'))
+    PDF_DERIVATIVE_CACHE_MAX_MB = int(os.environ.get('PDF_DERIVATIVE_CACHE_MAX_MB', 1024))
+
     # Local media storage (for development without Dropbox)
     LOCAL_MEDIA_PATH = os.environ.get('LOCAL_MEDIA_PATH')
     USE_LOCAL_MEDIA = os.environ.get('USE_LOCAL_MEDIA', 'false').lower() == 'true'
@@ -60,7 +98,7 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'postgresql://localhost/museum_collection_test'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'postgresql://localhost/museum_collection_test')
 
 
 config = {
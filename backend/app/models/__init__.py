@@ -4,3 +4,6 @@ from .media import Media
 from .annotation import Annotation
 from .submission import Submission, SubmissionImage
 from .thesaurus import Thesaurus
+from .stats_snapshot import StatsSnapshot
+from .activity_rollup import ActivityRollup
+from .job import Job
@@ -0,0 +1,21 @@
+from ..extensions import db
+
+
+class ActivityRollup(db.Model):
+    """Daily count of records added, per collection and entity type"""
+    __tablename__ = 'activity_rollups'
+
+    collection = db.Column(db.String(50), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+
+    # artifact, media or annotation
+    entity = db.Column(db.String(20), primary_key=True)
+
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_activity_rollups_day', 'day'),
+    )
+
+    def __repr__(self):
+        return f'<ActivityRollup {self.collection} {self.day} {self.entity}: {self.count}>'
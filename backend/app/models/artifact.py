@@ -1,8 +1,22 @@
 import uuid
 from datetime import datetime
+from sqlalchemy import event
 from ..extensions import db
 
 
+# Key documentation fields used for the completeness score
+COMPLETENESS_FIELDS = [
+    'accession_number', 'object_type', 'material', 'size_dimensions',
+    'description_observation', 'chronology', 'findspot'
+]
+
+
+def completeness_score(record) -> float:
+    """Percentage of COMPLETENESS_FIELDS filled on an artifact or a row selecting them"""
+    filled = sum(1 for f in COMPLETENESS_FIELDS if getattr(record, f))
+    return round(filled / len(COMPLETENESS_FIELDS) * 100, 1)
+
+
 class Artifact(db.Model):
     __tablename__ = 'artifacts'
 
@@ -32,6 +46,11 @@ class Artifact(db.Model):
     # Physical properties
     size_dimensions = db.Column(db.Text)
     weight = db.Column(db.String(100))
+    # Numeric values parsed from size_dimensions / weight, see measurement_service
+    max_dimension_mm = db.Column(db.Float, index=True)
+    dimension_confidence = db.Column(db.String(10))  # 'high' or 'low'
+    weight_g = db.Column(db.Float, index=True)
+    weight_confidence = db.Column(db.String(10))
     technique = db.Column(db.String(255))
 
     # Descriptions
@@ -43,6 +62,9 @@ class Artifact(db.Model):
     findspot = db.Column(db.String(255))
     production_place = db.Column(db.String(255))
     chronology = db.Column(db.String(255))
+    # Year range parsed from chronology (negative years are BCE), see chronology_service
+    date_start = db.Column(db.Integer)
+    date_end = db.Column(db.Integer)
     bibliography = db.Column(db.Text)
 
     # Photo reference
@@ -52,6 +74,9 @@ class Artifact(db.Model):
     british_museum_url = db.Column(db.String(500))  # Link to British Museum object
     external_links = db.Column(db.JSON)  # Other external references as JSON
 
+    # Percentage of COMPLETENESS_FIELDS filled, kept up to date on every write
+    completeness_score = db.Column(db.Float, nullable=False, default=0.0)
+
     # Tracking
     created_by = db.Column(db.String(36), db.ForeignKey('users.id'))
     updated_by = db.Column(db.String(36), db.ForeignKey('users.id'))
@@ -61,6 +86,21 @@ class Artifact(db.Model):
     # Relationships
     media_files = db.relationship('Media', backref='artifact', lazy='dynamic', cascade='all, delete-orphan')
 
+    __table_args__ = (
+        # Worklist ordering: lowest scores first within a collection, id breaks ties
+        db.Index('ix_artifacts_collection_completeness', 'collection', 'completeness_score', 'id'),
+        # Overlap queries: date_start <= :end AND date_end >= :start
+        db.Index('ix_artifacts_date_range', 'date_start', 'date_end'),
+    )
+
+    def compute_completeness(self):
+        """Percentage of key documentation fields that are filled"""
+        return completeness_score(self)
+
+    @property
+    def missing_fields(self):
+        return [f for f in COMPLETENESS_FIELDS if not getattr(self, f)]
+
     @property
     def primary_media(self):
         """Get primary image or first available"""
@@ -95,6 +135,10 @@ class Artifact(db.Model):
             'remarks': self.remarks,
             'size_dimensions': self.size_dimensions,
             'weight': self.weight,
+            'max_dimension_mm': self.max_dimension_mm,
+            'dimension_confidence': self.dimension_confidence,
+            'weight_g': self.weight_g,
+            'weight_confidence': self.weight_confidence,
             'technique': self.technique,
             'description_catalogue': self.description_catalogue,
             'description_observation': self.description_observation,
@@ -102,10 +146,13 @@ class Artifact(db.Model):
             'findspot': self.findspot,
             'production_place': self.production_place,
             'chronology': self.chronology,
+            'date_start': self.date_start,
+            'date_end': self.date_end,
             'bibliography': self.bibliography,
             'british_museum_url': self.british_museum_url,
             'external_links': self.external_links,
             'media_count': self.media_count,
+            'completeness_score': self.completeness_score,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -123,3 +170,9 @@ class Artifact(db.Model):
 
     def __repr__(self):
         return f'<Artifact {self.sequence_number}>'
+
+
+@event.listens_for(Artifact, 'before_insert')
+@event.listens_for(Artifact, 'before_update')
+def _update_completeness(mapper, connection, target):
+    target.completeness_score = target.compute_completeness()
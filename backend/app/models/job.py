@@ -0,0 +1,71 @@
+import uuid
+from datetime import datetime
+from ..extensions import db
+
+
+class Job(db.Model):
+    """Background job (exports, analytics reports) run by `flask worker`"""
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+
+    # Handler name, e.g. export_pdf, analytics_excel
+    kind = db.Column(db.String(50), nullable=False)
+
+    # Status: queued, running, succeeded, failed
+    status = db.Column(db.String(20), nullable=False, default='queued')
+
+    # Higher priority jobs are claimed first
+    priority = db.Column(db.Integer, nullable=False, default=0)
+
+    # Handler arguments (JSON)
+    params = db.Column(db.JSON)
+
+    # Retries
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Progress (0-100) and outcome
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+
+    # Result blob on disk
+    result_path = db.Column(db.String(500))
+    result_filename = db.Column(db.String(255))
+    result_mimetype = db.Column(db.String(100))
+
+    # Tracking
+    worker_id = db.Column(db.String(100))
+    created_by = db.Column(db.String(36), db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    # Refreshed by the running worker; a stale heartbeat means the worker died
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Claim order for queued jobs
+        db.Index('ix_jobs_claim', 'status', 'priority', 'created_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'priority': self.priority,
+            'progress': self.progress,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'error': self.error,
+            'result_filename': self.result_filename,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} ({self.status})>'
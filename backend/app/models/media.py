@@ -1,5 +1,6 @@
 import uuid
 from datetime import datetime
+from typing import Dict, Iterable, List, Optional
 from ..extensions import db
 
 
@@ -39,6 +40,23 @@ class Media(db.Model):
     # Relationships
     annotations = db.relationship('Annotation', backref='media', lazy='dynamic', cascade='all, delete-orphan')
 
+    @classmethod
+    def by_artifact(cls, artifact_ids: Iterable[str]) -> Dict[str, List['Media']]:
+        """Media of many artifacts in one query, as artifact id -> media in display order"""
+        grouped = {artifact_id: [] for artifact_id in artifact_ids}
+        if grouped:
+            media = cls.query.filter(cls.artifact_id.in_(list(grouped))).order_by(
+                cls.artifact_id, cls.sort_order, cls.created_at
+            )
+            for m in media:
+                grouped[m.artifact_id].append(m)
+        return grouped
+
+    @staticmethod
+    def pick_primary(media: List['Media']) -> Optional['Media']:
+        """Primary image of a preloaded media list, or the first available"""
+        return next((m for m in media if m.is_primary), media[0] if media else None)
+
     @property
     def annotation_count(self):
         return self.annotations.count()
@@ -0,0 +1,27 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class StatsSnapshot(db.Model):
+    """Precomputed statistics payload for one stats endpoint and collection"""
+    __tablename__ = 'stats_snapshots'
+
+    # Endpoint the payload belongs to: dashboard, collection or catalog
+    kind = db.Column(db.String(20), primary_key=True)
+
+    # Collection key; empty string for the combined museums
+    collection = db.Column(db.String(50), primary_key=True, default='')
+
+    payload = db.Column(db.JSON, nullable=False)
+
+    # Set by writes to artifacts, media, annotations, users or submissions
+    is_stale = db.Column(db.Boolean, nullable=False, default=False)
+
+    # Bumped with every invalidation, so a rebuild can tell whether a write
+    # landed while it was computing the payload
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<StatsSnapshot {self.kind}:{self.collection or "*"}>'
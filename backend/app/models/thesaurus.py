@@ -30,6 +30,11 @@ class Thesaurus(db.Model):
     # Parent term ID for hierarchical relationships (optional)
     parent_id = db.Column(db.String(36), db.ForeignKey('thesaurus.id'), nullable=True)
 
+    # Year range of a chronology term (negative years are BCE); used to date
+    # artifacts whose chronology names this period
+    date_start = db.Column(db.Integer)
+    date_end = db.Column(db.Integer)
+
     # Sort order within category
     sort_order = db.Column(db.Integer, default=0)
 
@@ -57,6 +62,8 @@ class Thesaurus(db.Model):
             'description': self.description,
             'alt_terms': self.alt_terms.split(',') if self.alt_terms else [],
             'parent_id': self.parent_id,
+            'date_start': self.date_start,
+            'date_end': self.date_end,
             'sort_order': self.sort_order,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -0,0 +1,72 @@
+"""
+Per-worker cache of prepared AnalyticsService instances.
+Entries are keyed by the analysed subset (e.g. the collection) and tagged with
+a cheap data-version probe, so a write to the artifacts invalidates them on
+the next lookup. Least recently used entries are evicted beyond the entry and
+memory limits. A cached service keeps adding encodings and contingency tables
+as it is used, so entry sizes are recounted on every lookup.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class AnalyticsFrameCache:
+    """LRU cache of analytics services bounded by entry count and memory."""
+
+    def __init__(self, max_entries: int = 8, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (version, service, size)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Hashable, version: Any, builder: Callable[[], Optional[Any]]):
+        """
+        Return the cached service for key if its version matches, else build it.
+
+        Args:
+            key: Identifies the analysed subset
+            version: Data-version probe; a different value invalidates the entry
+            builder: Callable returning a prepared AnalyticsService, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                service = entry[1]
+                # Tables derived by earlier requests count against the limit
+                self._entries[key] = (version, service, service.memory_usage())
+                self._entries.move_to_end(key)
+                self._evict()
+                self.hits += 1
+                return service
+            self.misses += 1
+
+        # Build outside the lock so other keys are not blocked
+        service = builder()
+        if service is None:
+            return None
+
+        size = service.memory_usage()
+        with self._lock:
+            self._entries.pop(key, None)
+            if size <= self.max_bytes:
+                self._entries[key] = (version, service, size)
+                self._evict()
+        return service
+
+    def _evict(self):
+        """Drop least recently used entries until both limits hold."""
+        while self._entries and (
+            len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            self._entries.popitem(last=False)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry[2] for entry in self._entries.values())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
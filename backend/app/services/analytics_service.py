@@ -4,83 +4,259 @@ Provides correlation analysis, statistical insights, and dynamic narratives.
 """
 import pandas as pd
 import numpy as np
-from scipy import stats
 from typing import Dict, List, Any, Optional, Tuple
 from collections import Counter
 from datetime import datetime
+from .contingency import ContingencyTable, build_contingency_tables, MONTE_CARLO_TIME_BUDGET
+
+# Artifact columns the analyses read; everything else stays in the database
+ANALYSIS_COLUMNS = [
+    'id', 'collection', 'object_type', 'material', 'chronology',
+    'findspot', 'production_place', 'on_display', 'max_dimension_mm', 'weight_g'
+]
+
+# Columns held as pd.Categorical so analyses work on integer codes
+CATEGORICAL_COLUMNS = ['collection', 'object_type', 'material', 'chronology', 'findspot', 'production_place']
+
+# Parsed measurements (see measurement_service) and their units
+NUMERIC_COLUMNS = {'max_dimension_mm': 'mm', 'weight_g': 'g'}
+
+# Quantiles reported by the numeric summaries
+SUMMARY_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Upper limit on histogram bins and on groups of a grouped numeric summary
+MAX_NUMERIC_BINS = 200
+MAX_NUMERIC_GROUPS = 20
+
+# Ways of computing the chi-square p-value; 'auto' uses Monte Carlo only
+# where expected counts are too small for the asymptotic test
+CHI_SQUARE_METHODS = ('asymptotic', 'monte_carlo', 'auto')
+
+# Monte Carlo time shared by all chi-square tests of the comprehensive report
+REPORT_MONTE_CARLO_BUDGET = 0.5
 
 
 class AnalyticsService:
     """Service for advanced statistical analysis of museum collections."""
 
-    def __init__(self, artifacts_data: List[Dict]):
-        """Initialize with artifact data."""
-        self.df = pd.DataFrame(artifacts_data)
+    def __init__(self, artifacts_data):
+        """Initialize with artifact data (a DataFrame or a list of dictionaries)."""
+        if isinstance(artifacts_data, pd.DataFrame):
+            self.df = artifacts_data
+        else:
+            self.df = pd.DataFrame(artifacts_data)
+        self._encodings = {}
+        self._tables = {}
+        self._df_bytes = None
         self._prepare_data()
 
     def _prepare_data(self):
         """Prepare and clean data for analysis."""
-        # Fill NaN values for categorical columns
-        categorical_cols = ['collection', 'object_type', 'material', 'chronology', 'findspot', 'production_place']
-        for col in categorical_cols:
+        # Fill NaN values and encode categorical columns; the category index of
+        # each column is the dictionary shared by every analysis on that column
+        for col in CATEGORICAL_COLUMNS:
             if col in self.df.columns:
-                self.df[col] = self.df[col].fillna('Unknown')
+                self.df[col] = pd.Categorical(self.df[col].fillna('Unknown'))
+
+        # Nullable boolean column: treat missing as not on display
+        if 'on_display' in self.df.columns:
+            self.df['on_display'] = self.df['on_display'].astype('boolean').fillna(False).astype(bool)
 
-    def get_cross_tabulation(self, row_var: str, col_var: str) -> Dict:
+        # Measurements as float with NaN for unparsed values
+        for col in NUMERIC_COLUMNS:
+            if col in self.df.columns:
+                self.df[col] = pd.to_numeric(self.df[col], errors='coerce').astype(float)
+
+    def memory_usage(self) -> int:
+        """Bytes held by the frame and by the encodings and tables derived from it so far."""
+        if self._df_bytes is None:
+            self._df_bytes = int(self.df.memory_usage(deep=True).sum())
+        encodings = sum(codes.nbytes for codes, _ in self._encodings.values())
+        tables = sum(table.counts.nbytes for table in self._tables.values())
+        return self._df_bytes + encodings + tables
+
+    def _encoded(self, var: str) -> Tuple[np.ndarray, pd.Index]:
+        """Integer codes (-1 for missing) and sorted category labels of a column."""
+        if var not in self._encodings:
+            series = self.df[var]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+            else:
+                codes, categories = pd.factorize(series, sort=True)
+            self._encodings[var] = (np.asarray(codes, dtype=np.intp), pd.Index(categories))
+        return self._encodings[var]
+
+    def _value_counts(self, var: str, mask: Optional[np.ndarray] = None) -> pd.Series:
+        """Counts of the observed values of a column, most frequent first."""
+        codes, categories = self._encoded(var)
+        if mask is not None:
+            codes = codes[mask]
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        # Stable sort: ties stay in category (alphabetical) order
+        order = np.argsort(-counts, kind='stable')
+        order = order[counts[order] > 0]
+        return pd.Series(counts[order], index=categories[order])
+
+    def _top_values(self, var: str, n: int, mask: Optional[np.ndarray] = None) -> Dict:
+        """Top-n values of a column as a {label: count} dictionary."""
+        counts = self._value_counts(var, mask).head(n)
+        return {label: int(count) for label, count in counts.items()}
+
+    def compute_contingency_tables(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], ContingencyTable]:
+        """Contingency tables for several variable pairs, counted together in one pass."""
+        missing = [p for p in dict.fromkeys(pairs) if p not in self._tables]
+        if missing:
+            encoded = {var: self._encoded(var) for pair in missing for var in pair}
+            self._tables.update(build_contingency_tables(missing, encoded))
+        return {p: self._tables[p] for p in pairs}
+
+    def _contingency_table(self, row_var: str, col_var: str) -> ContingencyTable:
+        """Contingency table of two columns, counted once and reused."""
+        return self.compute_contingency_tables([(row_var, col_var)])[(row_var, col_var)]
+
+    def get_cross_tabulation(self, row_var: str, col_var: str, max_rows: Optional[int] = None,
+                             max_cols: Optional[int] = None, sparse: bool = False) -> Dict:
         """
         Create cross-tabulation between two categorical variables.
         Returns counts and percentages.
+
+        max_rows / max_cols keep the most frequent categories and fold the
+        rest into "Other". With sparse=True only the non-zero cells are
+        returned, as {row, col, count} triplets indexing rows and columns.
         """
         if row_var not in self.df.columns or col_var not in self.df.columns:
             return {'error': f'Variable not found: {row_var} or {col_var}'}
 
-        # Create cross-tabulation
-        crosstab = pd.crosstab(self.df[row_var], self.df[col_var], margins=True, margins_name='Total')
-
-        # Calculate percentages
-        crosstab_pct = pd.crosstab(self.df[row_var], self.df[col_var], normalize='all', margins=True, margins_name='Total') * 100
+        # Counts and percentages, both with totals, from the same table
+        table = self._contingency_table(row_var, col_var).bounded(max_rows, max_cols)
+
+        if sparse:
+            return {
+                'format': 'sparse',
+                'rows': table.row_labels.tolist(),
+                'columns': table.col_labels.tolist(),
+                'cells': [{'row': r, 'col': c, 'count': n} for r, c, n in table.cells()],
+                'row_totals': table.row_totals.tolist(),
+                'column_totals': table.col_totals.tolist(),
+                'total': table.total,
+                'other_rows': table.other_rows,
+                'other_columns': table.other_cols,
+                'row_variable': row_var,
+                'col_variable': col_var
+            }
 
         # Convert to serializable format
         result = {
-            'rows': crosstab.index.tolist(),
-            'columns': crosstab.columns.tolist(),
-            'counts': crosstab.values.tolist(),
-            'percentages': crosstab_pct.round(2).values.tolist(),
+            'rows': table.row_labels.tolist() + ['Total'],
+            'columns': table.col_labels.tolist() + ['Total'],
+            'counts': table.with_margins().tolist(),
+            'percentages': np.round(table.percentages(), 2).tolist(),
+            'other_rows': table.other_rows,
+            'other_columns': table.other_cols,
             'row_variable': row_var,
             'col_variable': col_var
         }
 
         return result
 
-    def chi_square_test(self, var1: str, var2: str) -> Dict:
+    def chi_square_test(self, var1: str, var2: str, max_rows: Optional[int] = None,
+                        max_cols: Optional[int] = None, method: str = 'asymptotic',
+                        time_budget: float = MONTE_CARLO_TIME_BUDGET, seed: int = 0) -> Dict:
         """
         Perform Chi-square test of independence between two categorical variables.
+
+        The test runs on the same bounded table as get_cross_tabulation; a
+        warning is returned when expected counts are too small for it. With
+        method='monte_carlo' (or 'auto' on such tables) the p-value comes from
+        a seeded permutation test limited to time_budget seconds instead.
         """
         if var1 not in self.df.columns or var2 not in self.df.columns:
             return {'error': f'Variable not found'}
-
-        # Create contingency table
-        contingency = pd.crosstab(self.df[var1], self.df[var2])
-
-        # Perform chi-square test
-        chi2, p_value, dof, expected = stats.chi2_contingency(contingency)
+        if method not in CHI_SQUARE_METHODS:
+            return {'error': f'Unknown method: {method}'}
+
+        # Chi-square and effect size from the shared contingency table
+        table = self._contingency_table(var1, var2).bounded(max_rows, max_cols)
+        warning = table.expected_count_warning()
+        cramers_v = table.cramers_v()
+
+        monte_carlo = None
+        if method == 'monte_carlo' or (method == 'auto' and warning):
+            monte_carlo = table.chi_square_monte_carlo(seed=seed, time_budget=time_budget)
+            if monte_carlo['method'] != 'monte_carlo':
+                # The time budget did not fit a single resample batch
+                monte_carlo = None
+        if monte_carlo is not None:
+            chi2, p_value, dof = monte_carlo['chi_square'], monte_carlo['p_value'], monte_carlo['degrees_of_freedom']
+            warning = None if monte_carlo['converged'] else (
+                f"Monte Carlo p-value from {monte_carlo['resamples']} resamples did not "
+                f"reach the target precision; 95% CI {monte_carlo['p_value_ci'][0]:.4f}-{monte_carlo['p_value_ci'][1]:.4f}."
+            )
+        else:
+            chi2, p_value, dof = table.chi_square()
 
         # Interpret results
         significance = 'significant' if p_value < 0.05 else 'not significant'
-        strength = self._interpret_chi_square(chi2, len(self.df))
+        strength = self._interpret_chi_square(cramers_v)
 
-        return {
+        result = {
             'chi_square': round(chi2, 4),
             'p_value': round(p_value, 6),
             'degrees_of_freedom': dof,
+            'cramers_v': round(cramers_v, 4),
+            'min_expected': round(table.min_expected(), 4),
+            'warning': warning,
             'significance': significance,
             'strength': strength,
             'interpretation': self._generate_chi_square_narrative(var1, var2, chi2, p_value, strength)
         }
 
-    def _interpret_chi_square(self, chi2: float, n: int) -> str:
+        if monte_carlo is None:
+            result['method'] = 'asymptotic'
+        else:
+            result.update({
+                'method': 'monte_carlo',
+                'resamples': monte_carlo['resamples'],
+                'p_value_ci': [round(bound, 6) for bound in monte_carlo['p_value_ci']]
+            })
+
+        return result
+
+    def get_association_matrix(self, variables: List[str]) -> Dict:
+        """
+        Pairwise association of categorical variables as k x k matrices.
+
+        Returns bias-corrected Cramér's V (symmetric), chi-square p-values and
+        Theil's U, where theils_u[i][j] is U(variables[i] | variables[j]).
+        """
+        missing = [v for v in variables if v not in self.df.columns]
+        if missing:
+            return {'error': f'Variable not found: {", ".join(missing)}'}
+
+        k = len(variables)
+        pairs = [(variables[i], variables[j]) for i in range(k) for j in range(i + 1, k)]
+        tables = self.compute_contingency_tables(pairs)
+
+        cramers_v = np.eye(k)
+        p_values = np.zeros((k, k))
+        theils_u = np.eye(k)
+        for i in range(k):
+            for j in range(i + 1, k):
+                table = tables[(variables[i], variables[j])]
+                cramers_v[i, j] = cramers_v[j, i] = table.cramers_v_corrected()
+                p_values[i, j] = p_values[j, i] = table.chi_square(correction=False)[1]
+                theils_u[i, j], theils_u[j, i] = table.theils_u()
+
+        return {
+            'variables': variables,
+            'cramers_v': np.round(cramers_v, 4).tolist(),
+            'p_values': np.round(p_values, 6).tolist(),
+            'theils_u': np.round(theils_u, 4).tolist(),
+            'n': len(self.df)
+        }
+
+    def _interpret_chi_square(self, cramers_v: float) -> str:
         """Interpret chi-square effect size using Cramer's V."""
-        cramers_v = np.sqrt(chi2 / n) if n > 0 else 0
         if cramers_v < 0.1:
             return 'negligible'
         elif cramers_v < 0.3:
@@ -102,7 +278,7 @@ class AnalyticsService:
         if variable not in self.df.columns:
             return {'error': f'Variable not found: {variable}'}
 
-        counts = self.df[variable].value_counts()
+        counts = self._value_counts(variable)
         total = len(self.df)
 
         # Calculate statistics
@@ -130,22 +306,118 @@ class AnalyticsService:
             'mode_count': int(counts.iloc[0]) if len(counts) > 0 else 0
         }
 
+    def get_numeric_summary(self, variable: str, bins: int = 20, scale: str = 'linear',
+                            group_by: Optional[str] = None) -> Dict:
+        """
+        Summary statistics, quantiles and histogram of a parsed measurement.
+
+        scale='log' spaces the bins geometrically, which suits the skewed sizes
+        and weights of a mixed collection. group_by adds median and quartiles
+        per value of a categorical column, largest groups first.
+        """
+        if variable not in NUMERIC_COLUMNS or variable not in self.df.columns:
+            return {'error': f'Numeric variable not found: {variable}'}
+        if scale not in ('linear', 'log'):
+            return {'error': f'Unknown scale: {scale}'}
+        if not 1 <= bins <= MAX_NUMERIC_BINS:
+            return {'error': f'bins must be between 1 and {MAX_NUMERIC_BINS}'}
+        if group_by is not None and (group_by not in CATEGORICAL_COLUMNS + ['on_display']
+                                     or group_by not in self.df.columns):
+            return {'error': f'Variable not found: {group_by}'}
+
+        values = self.df[variable].to_numpy(dtype=float)
+        measured = ~np.isnan(values)
+        present = values[measured]
+
+        result = {
+            'variable': variable,
+            'unit': NUMERIC_COLUMNS[variable],
+            'count': int(measured.sum()),
+            'missing': int((~measured).sum()),
+            'scale': scale,
+        }
+        if len(present) == 0:
+            result.update(mean=None, std=None, min=None, max=None, quantiles={}, histogram=[])
+            return result
+
+        quantiles = np.quantile(present, SUMMARY_QUANTILES)
+        result.update(
+            mean=round(float(present.mean()), 3),
+            std=round(float(present.std(ddof=1)), 3) if len(present) > 1 else None,
+            min=float(present.min()),
+            max=float(present.max()),
+            quantiles={f'p{round(q * 100)}': round(float(v), 3) for q, v in zip(SUMMARY_QUANTILES, quantiles)},
+            histogram=self._numeric_histogram(present, bins, scale)
+        )
+
+        if group_by is not None:
+            result['group_by'] = group_by
+            result['groups'] = self._grouped_quantiles(group_by, values, measured)
+
+        return result
+
+    def _numeric_histogram(self, values: np.ndarray, bins: int, scale: str) -> List[Dict]:
+        """Bins as [{start, end, count}]; log bins leave out values that are not positive."""
+        if scale == 'log':
+            values = values[values > 0]
+            if len(values) == 0:
+                return []
+            low, high = values.min(), values.max()
+            edges = np.geomspace(low, high, bins + 1) if high > low else bins
+        else:
+            edges = bins
+
+        counts, edges = np.histogram(values, bins=edges)
+        return [
+            {'start': round(float(start), 3), 'end': round(float(end), 3), 'count': int(count)}
+            for start, end, count in zip(edges[:-1], edges[1:], counts)
+        ]
+
+    def _grouped_quantiles(self, group_var: str, values: np.ndarray, measured: np.ndarray) -> List[Dict]:
+        """Count, median and quartiles of the measured values per group, largest groups first."""
+        codes, categories = self._encoded(group_var)
+        keep = measured & (codes >= 0)
+        codes, values = codes[keep], values[keep]
+
+        counts = np.bincount(codes, minlength=len(categories))
+        order = np.argsort(-counts, kind='stable')
+        order = order[counts[order] > 0][:MAX_NUMERIC_GROUPS]
+
+        # Sort by (group, value) once; each group is then a contiguous run
+        sorted_idx = np.lexsort((values, codes))
+        values = values[sorted_idx]
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        groups = []
+        for i in order:
+            group_values = values[offsets[i]:offsets[i + 1]]
+            q1, median, q3 = np.quantile(group_values, (0.25, 0.5, 0.75))
+            groups.append({
+                'value': str(categories[i]),
+                'count': int(counts[i]),
+                'median': round(float(median), 3),
+                'q1': round(float(q1), 3),
+                'q3': round(float(q3), 3),
+            })
+        return groups
+
     def compare_collections(self) -> Dict:
         """Compare artifact characteristics between collections."""
         if 'collection' not in self.df.columns:
             return {'error': 'No collection data available'}
 
         collections = self.df['collection'].unique()
+        collection_codes, collection_labels = self._encoded('collection')
         comparison = {}
 
         for col in collections:
-            subset = self.df[self.df['collection'] == col]
+            mask = collection_codes == collection_labels.get_loc(col)
             comparison[col] = {
-                'total': len(subset),
-                'object_types': subset['object_type'].value_counts().head(5).to_dict() if 'object_type' in subset.columns else {},
-                'materials': subset['material'].value_counts().head(5).to_dict() if 'material' in subset.columns else {},
-                'chronologies': subset['chronology'].value_counts().head(5).to_dict() if 'chronology' in subset.columns else {},
-                'on_display_pct': round(subset['on_display'].mean() * 100, 1) if 'on_display' in subset.columns else 0
+                'total': int(mask.sum()),
+                'object_types': self._top_values('object_type', 5, mask) if 'object_type' in self.df.columns else {},
+                'materials': self._top_values('material', 5, mask) if 'material' in self.df.columns else {},
+                'chronologies': self._top_values('chronology', 5, mask) if 'chronology' in self.df.columns else {},
+                'on_display_pct': round(self.df['on_display'].to_numpy()[mask].mean() * 100, 1) if 'on_display' in self.df.columns else 0
             }
 
         # Find commonalities and differences
@@ -225,29 +497,77 @@ class AnalyticsService:
 
         return "\n\n".join(narratives)
 
+    def _grouped_top_values(self, group_var: str, value_var: str, groups: pd.Index,
+                            n: Optional[int] = None) -> List[Dict]:
+        """
+        Top-n values of one column within each group of another.
+
+        Reads the shared contingency table and sorts every row at once; returns
+        one {label: count} dictionary per entry of groups, most frequent first.
+        """
+        if value_var not in self.df.columns:
+            return [{} for _ in groups]
+
+        table = self._contingency_table(group_var, value_var)
+        rows = table.row_labels.get_indexer(groups)
+        counts = table.counts[np.maximum(rows, 0)]
+
+        # Descending sort of every row, breaking ties exactly as value_counts()
+        # does (pandas' nargsort: reverse, ascending quicksort, reverse back)
+        n_cols = counts.shape[1]
+        order = (n_cols - 1 - np.argsort(counts[:, ::-1], axis=1, kind='quicksort'))[:, ::-1]
+        if n is not None:
+            order = order[:, :n]
+        top_counts = np.take_along_axis(counts, order, axis=1)
+        top_labels = table.col_labels.to_numpy()[order]
+
+        return [
+            {label: int(count) for label, count in zip(labels, row_counts) if count > 0} if row >= 0 else {}
+            for row, labels, row_counts in zip(rows, top_labels, top_counts)
+        ]
+
+    def _group_sizes(self, var: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-category counts of a column and the observed category positions, most frequent first."""
+        codes, categories = self._encoded(var)
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        observed = np.flatnonzero(counts)
+        # Stable sort: ties stay in category (alphabetical) order
+        observed = observed[np.argsort(-counts[observed], kind='stable')]
+        return counts, observed
+
     def get_material_analysis(self) -> Dict:
         """Detailed analysis of materials across the collection."""
         if 'material' not in self.df.columns:
             return {'error': 'No material data available'}
 
-        material_data = self.df.groupby('material').agg({
-            'id': 'count',
-            'on_display': 'mean' if 'on_display' in self.df.columns else lambda x: 0,
-            'collection': lambda x: x.value_counts().to_dict() if 'collection' in self.df.columns else {}
-        }).reset_index()
-
-        materials = []
-        for _, row in material_data.iterrows():
-            materials.append({
-                'material': row['material'],
-                'count': int(row['id']),
-                'percentage': round(row['id'] / len(self.df) * 100, 2),
-                'on_display_pct': round(row['on_display'] * 100, 1) if isinstance(row['on_display'], float) else 0,
-                'by_collection': row['collection'] if isinstance(row['collection'], dict) else {}
-            })
+        codes, categories = self._encoded('material')
+        counts, observed = self._group_sizes('material')
+        total = len(self.df)
 
-        # Sort by count
-        materials = sorted(materials, key=lambda x: x['count'], reverse=True)
+        # Share on display per material as a weighted count over the same codes
+        if 'on_display' in self.df.columns:
+            valid = codes >= 0
+            displayed = np.bincount(
+                codes[valid],
+                weights=self.df['on_display'].to_numpy(dtype=float)[valid],
+                minlength=len(categories)
+            )
+            display_pct = [round(float(displayed[i] / counts[i]) * 100, 1) for i in observed]
+        else:
+            display_pct = [0] * len(observed)
+
+        by_collection = self._grouped_top_values('material', 'collection', categories[observed])
+
+        materials = [
+            {
+                'material': categories[i],
+                'count': int(counts[i]),
+                'percentage': round(int(counts[i]) / total * 100, 2),
+                'on_display_pct': pct,
+                'by_collection': collections
+            }
+            for i, pct, collections in zip(observed, display_pct, by_collection)
+        ]
 
         return {
             'materials': materials,
@@ -277,23 +597,28 @@ class AnalyticsService:
         if 'chronology' not in self.df.columns:
             return {'error': 'No chronology data available'}
 
-        chrono_data = self.df.groupby('chronology').agg({
-            'id': 'count',
-            'material': lambda x: x.value_counts().head(3).to_dict() if 'material' in self.df.columns else {},
-            'object_type': lambda x: x.value_counts().head(3).to_dict() if 'object_type' in self.df.columns else {}
-        }).reset_index()
-
-        periods = []
-        for _, row in chrono_data.iterrows():
-            periods.append({
-                'period': row['chronology'],
-                'count': int(row['id']),
-                'percentage': round(row['id'] / len(self.df) * 100, 2),
-                'top_materials': row['material'] if isinstance(row['material'], dict) else {},
-                'top_types': row['object_type'] if isinstance(row['object_type'], dict) else {}
-            })
+        categories = self._encoded('chronology')[1]
+        counts, observed = self._group_sizes('chronology')
+        total = len(self.df)
 
-        periods = sorted(periods, key=lambda x: x['count'], reverse=True)
+        # Both per-period breakdowns come from one counting pass
+        self.compute_contingency_tables([
+            ('chronology', var) for var in ('material', 'object_type') if var in self.df.columns
+        ])
+        groups = categories[observed]
+        top_materials = self._grouped_top_values('chronology', 'material', groups, 3)
+        top_types = self._grouped_top_values('chronology', 'object_type', groups, 3)
+
+        periods = [
+            {
+                'period': categories[i],
+                'count': int(counts[i]),
+                'percentage': round(int(counts[i]) / total * 100, 2),
+                'top_materials': materials,
+                'top_types': types
+            }
+            for i, materials, types in zip(observed, top_materials, top_types)
+        ]
 
         return {
             'periods': periods,
@@ -344,26 +669,37 @@ class AnalyticsService:
             if var in self.df.columns:
                 report['distributions'][var] = self.get_distribution_analysis(var)
 
+        # Size and weight summaries
+        report['measurements'] = {
+            var: self.get_numeric_summary(var, scale='log')
+            for var in NUMERIC_COLUMNS if var in self.df.columns
+        }
+
         # Collection comparison
         if 'collection' in self.df.columns and self.df['collection'].nunique() > 1:
             report['collection_comparison'] = self.compare_collections()
 
-        # Key correlations
+        # Key correlations, counted together in one pass
         correlation_pairs = [
-            ('collection', 'material'),
-            ('collection', 'object_type'),
-            ('material', 'object_type'),
-            ('chronology', 'material'),
-            ('chronology', 'object_type')
+            (var1, var2) for var1, var2 in [
+                ('collection', 'material'),
+                ('collection', 'object_type'),
+                ('material', 'object_type'),
+                ('chronology', 'material'),
+                ('chronology', 'object_type')
+            ]
+            if var1 in self.df.columns and var2 in self.df.columns
         ]
+        self.compute_contingency_tables(correlation_pairs)
 
+        # Sparse tables get a Monte Carlo p-value; the pairs share one time budget
+        time_budget = REPORT_MONTE_CARLO_BUDGET / max(1, len(correlation_pairs))
         for var1, var2 in correlation_pairs:
-            if var1 in self.df.columns and var2 in self.df.columns:
-                key = f"{var1}_vs_{var2}"
-                report['correlations'][key] = {
-                    'crosstab': self.get_cross_tabulation(var1, var2),
-                    'chi_square': self.chi_square_test(var1, var2)
-                }
+            key = f"{var1}_vs_{var2}"
+            report['correlations'][key] = {
+                'crosstab': self.get_cross_tabulation(var1, var2),
+                'chi_square': self.chi_square_test(var1, var2, method='auto', time_budget=time_budget)
+            }
 
         # Generate main narrative
         report['main_narrative'] = self._generate_main_narrative(report)
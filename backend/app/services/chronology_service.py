@@ -0,0 +1,319 @@
+"""
+Chronology dating.
+Parses the free-text chronology of an artifact ("1st-3rd century AD",
+"c. 1500 BCE", "Iron Age") into a numeric year range stored in
+date_start / date_end, so periods can be filtered by overlap and binned in
+SQL. Years are signed integers: negative years are BCE, there is no year 0.
+Named periods come from chronology terms of the thesaurus that carry a year
+range, falling back to DEFAULT_PERIODS.
+"""
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, event, func, inspect, select
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models import Artifact, Thesaurus
+from .stats_service import invalidate_snapshots
+
+# Built-in named periods (South Asian conventions where they differ);
+# thesaurus chronology terms with date_start / date_end override them
+DEFAULT_PERIODS = {
+    'palaeolithic': (-2600000, -10000),
+    'paleolithic': (-2600000, -10000),
+    'mesolithic': (-10000, -6000),
+    'neolithic': (-6000, -2000),
+    'chalcolithic': (-3000, -1000),
+    'bronze age': (-3300, -1200),
+    'harappan': (-3300, -1300),
+    'iron age': (-1200, -300),
+    'megalithic': (-1200, -300),
+    'early historic': (-300, 300),
+    'sangam': (-300, 300),
+    'roman': (-27, 476),
+    'early medieval': (500, 1000),
+    'medieval': (500, 1500),
+    'late medieval': (1000, 1500),
+    'chola': (850, 1279),
+    'vijayanagara': (1336, 1646),
+    'mughal': (1526, 1857),
+    'colonial': (1757, 1947),
+    'modern': (1800, 2000),
+}
+
+# Seconds a worker keeps the period table before re-reading the thesaurus
+PERIOD_TABLE_TTL = 300
+
+_ERA_PATTERNS = [
+    (re.compile(r'\b(?:b\.?\s?c\.?\s?e\.?|b\.?\s?c\.?)(?=\s|$|-)'), ' bc'),
+    (re.compile(r'\b(?:c\.?\s?e\.?|a\.?\s?d\.?)(?=\s|$|-)'), ' ad'),
+]
+_CIRCA = re.compile(r'^(?:circa|ca\.?|c\.|c(?=\s?\d)|about|approx\.?|approximately)\s*')
+_QUALIFIER = re.compile(r'^(early|mid|middle|late)\b[\s-]*')
+_POINT = re.compile(
+    r'^(?:(?P<prefix_era>ad)\s*)?(?P<num>\d+)\s*(?P<ordinal>st|nd|rd|th)?(?P<decade>s)?\s*'
+    r'(?P<unit>centur(?:y|ies)|cent\.?|c\.?|millenni(?:um|a))?\s*(?P<era>bc|ad)?$'
+)
+
+_period_cache = {'periods': None, 'loaded_at': 0.0}
+
+
+def _normalize(text: str) -> str:
+    text = text.lower().replace('–', '-').replace('—', '-')
+    text = re.sub(r'\s+to\s+|/', '-', text)
+    text = text.replace('?', ' ')
+    for pattern, replacement in _ERA_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return re.sub(r'\s+', ' ', text).strip(' .,;')
+
+
+def _apply_qualifier(span: Tuple[int, int], qualifier: Optional[str]) -> Tuple[int, int]:
+    """Narrow a span to its first, middle or last third."""
+    if not qualifier:
+        return span
+    start, end = span
+    third = (end - start + 1) // 3
+    if third == 0:
+        return span
+    if qualifier == 'early':
+        return start, start + third - 1
+    if qualifier == 'late':
+        return end - third + 1, end
+    return start + third, end - third
+
+
+def _unit_span(num: int, unit: str, bc: bool) -> Tuple[int, int]:
+    """Years covered by the num-th century or millennium."""
+    size = 1000 if unit.startswith('millenni') else 100
+    if bc:
+        return -num * size, -(num - 1) * size - 1
+    return (num - 1) * size + 1, num * size
+
+
+def _parse_part(part: str, periods: Dict[str, Tuple[int, int]]) -> Optional[Dict]:
+    """One side of a range: a year, decade, century, millennium or named period."""
+    part = _CIRCA.sub('', part.strip())
+    name = _period_name(part)
+    if name in periods:
+        return {'span': periods[name], 'era': None, 'unit': None}
+
+    qualifier = None
+    match = _QUALIFIER.match(part)
+    if match:
+        qualifier = 'mid' if match.group(1) == 'middle' else match.group(1)
+        part = part[match.end():]
+
+    match = _POINT.match(part)
+    if match:
+        unit = match.group('unit')
+        if unit and unit.startswith('c'):
+            unit = 'century'
+        return {
+            'num': int(match.group('num')),
+            'ordinal': bool(match.group('ordinal')),
+            'decade': bool(match.group('decade')),
+            'unit': unit,
+            'era': match.group('era') or match.group('prefix_era'),
+            'qualifier': qualifier,
+        }
+
+    span = _lookup_period(part, periods)
+    if span is None:
+        return None
+    return {'span': _apply_qualifier(span, qualifier), 'era': None, 'unit': None}
+
+
+def _period_name(text: str) -> str:
+    text = re.sub(r'\b(?:period|dynasty|era)\b', ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _lookup_period(text: str, periods: Dict[str, Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+    """Exact period name, else the longest period name contained in the text."""
+    text = _period_name(text)
+    if text in periods:
+        return periods[text]
+    for name in sorted(periods, key=len, reverse=True):
+        if re.search(rf'\b{re.escape(name)}\b', text):
+            return periods[name]
+    return None
+
+
+def _resolve(part: Dict, era: Optional[str], unit: Optional[str]) -> Tuple[int, int]:
+    if 'span' in part:
+        return part['span']
+
+    bc = (part['era'] or era) == 'bc'
+    num = part['num']
+    unit = part['unit'] or (unit if part['ordinal'] else None)
+    if part['ordinal'] and not unit:
+        unit = 'century'
+
+    if unit:
+        span = _unit_span(num, unit, bc)
+    elif part['decade']:
+        # "1850s" is a decade, "1800s" a century
+        size = 100 if num % 100 == 0 else 10
+        span = (-(num + size - 1), -num) if bc else (num, num + size - 1)
+    else:
+        span = (-num, -num) if bc else (num, num)
+    return _apply_qualifier(span, part['qualifier'])
+
+
+def parse_chronology(text: Optional[str], periods: Optional[Dict[str, Tuple[int, int]]] = None) -> Optional[Tuple[int, int]]:
+    """
+    Year range (start, end) of a chronology string, or None if it cannot be dated.
+
+    Handles years, decades, ordinal centuries and millennia with BC/BCE and
+    AD/CE in either position, circa, early/mid/late qualifiers, ranges
+    ("500 BC - 200 AD", "1st-3rd century AD", "2nd-1st century BC") and named
+    periods from the period table.
+    """
+    if not text or not text.strip():
+        return None
+    if periods is None:
+        periods = DEFAULT_PERIODS
+
+    normalized = _normalize(text)
+    if normalized in periods:
+        return periods[normalized]
+
+    pieces = [p for p in normalized.split('-') if p.strip()]
+    parts = [_parse_part(p, periods) for p in pieces] if len(pieces) <= 2 else [None]
+    if not parts or any(p is None for p in parts):
+        # Hyphenated period names ("Early-Historic")
+        part = _parse_part(normalized.replace('-', ' '), periods)
+        return part['span'] if part and 'span' in part else None
+
+    # The era and unit written on one side of a range apply to the other side
+    # ("500-300 BC", "1st-3rd century AD")
+    eras = [p.get('era') for p in parts]
+    units = [p.get('unit') for p in parts]
+    if len(parts) == 2:
+        spans = [
+            _resolve(parts[0], eras[1], units[1]),
+            _resolve(parts[1], eras[0], units[0]),
+        ]
+    else:
+        spans = [_resolve(parts[0], None, None)]
+
+    start = min(s[0] for s in spans)
+    end = max(s[1] for s in spans)
+    return start, end
+
+
+def get_period_table(connection=None) -> Dict[str, Tuple[int, int]]:
+    """Named periods (lower-case name -> year range), cached per worker for PERIOD_TABLE_TTL."""
+    now = time.monotonic()
+    if _period_cache['periods'] is not None and now - _period_cache['loaded_at'] < PERIOD_TABLE_TTL:
+        return _period_cache['periods']
+
+    periods = dict(DEFAULT_PERIODS)
+    rows = (connection or db.session).execute(
+        select(Thesaurus.term, Thesaurus.alt_terms, Thesaurus.date_start, Thesaurus.date_end).where(
+            Thesaurus.category == 'chronology',
+            Thesaurus.is_active == True,
+            Thesaurus.date_start.isnot(None),
+            Thesaurus.date_end.isnot(None)
+        )
+    ).all()
+    for term, alt_terms, date_start, date_end in rows:
+        span = (min(date_start, date_end), max(date_start, date_end))
+        for name in [term] + (alt_terms.split(',') if alt_terms else []):
+            if name.strip():
+                periods[_normalize(name)] = span
+
+    _period_cache.update(periods=periods, loaded_at=now)
+    return periods
+
+
+def invalidate_period_table():
+    _period_cache.update(periods=None, loaded_at=0.0)
+
+
+def date_artifact(artifact: Artifact, periods: Dict[str, Tuple[int, int]]):
+    """Set date_start / date_end from the artifact's chronology."""
+    span = parse_chronology(artifact.chronology, periods)
+    artifact.date_start, artifact.date_end = span if span else (None, None)
+
+
+def _date_changed_artifacts(session, flush_context, instances):
+    """Re-date artifacts whose chronology is new or changed in this flush."""
+    artifacts = [
+        o for o in session.new if isinstance(o, Artifact)
+    ] + [
+        o for o in session.dirty
+        if isinstance(o, Artifact) and inspect(o).attrs.chronology.history.has_changes()
+    ]
+    if not artifacts:
+        return
+
+    with session.no_autoflush:
+        periods = get_period_table(session)
+    for artifact in artifacts:
+        date_artifact(artifact, periods)
+
+
+def _invalidate_on_thesaurus_write(session, flush_context):
+    if any(isinstance(o, Thesaurus) for o in (*session.new, *session.dirty, *session.deleted)):
+        invalidate_period_table()
+
+
+def register_chronology_dating():
+    """Install the flush hooks that keep date_start / date_end in step with chronology."""
+    if not event.contains(Session, 'before_flush', _date_changed_artifacts):
+        event.listen(Session, 'before_flush', _date_changed_artifacts)
+    if not event.contains(Session, 'after_flush', _invalidate_on_thesaurus_write):
+        event.listen(Session, 'after_flush', _invalidate_on_thesaurus_write)
+
+
+def backfill_chronology_dates(batch_size: int = 500) -> Tuple[int, int]:
+    """
+    Re-date every artifact from its chronology, e.g. after the period table
+    changed. Returns (updated, dated) artifact counts.
+    """
+    invalidate_period_table()
+    periods = get_period_table()
+    table = Artifact.__table__
+    # Re-dating is not an edit: updated_at is set to itself so that its
+    # onupdate default does not fire
+    stmt = table.update().where(table.c.id == bindparam('artifact_id')).values(
+        date_start=bindparam('start'), date_end=bindparam('end'), updated_at=table.c.updated_at
+    )
+    query = select(
+        table.c.id, table.c.chronology, table.c.date_start, table.c.date_end
+    ).order_by(table.c.id).limit(batch_size)
+
+    updated = dated = 0
+    last_id = ''
+    while True:
+        rows = db.session.execute(query.where(table.c.id > last_id)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        changes = []
+        for row in rows:
+            start, end = parse_chronology(row.chronology, periods) or (None, None)
+            if start is not None:
+                dated += 1
+            if (start, end) != (row.date_start, row.date_end):
+                changes.append({'artifact_id': row.id, 'start': start, 'end': end})
+        if changes:
+            db.session.execute(stmt, changes)
+            invalidate_snapshots(db.session.connection())
+            updated += len(changes)
+        db.session.commit()
+
+    return updated, dated
+
+
+def undated_chronologies(limit: int = 20) -> List[Tuple[str, int]]:
+    """Most frequent chronology strings the parser could not date."""
+    return db.session.execute(
+        select(Artifact.chronology, func.count()).where(
+            Artifact.chronology.isnot(None),
+            Artifact.chronology != '',
+            Artifact.date_start.is_(None)
+        ).group_by(Artifact.chronology).order_by(func.count().desc()).limit(limit)
+    ).all()
@@ -0,0 +1,351 @@
+"""
+Contingency engine for categorical analytics.
+Counts every requested pair of integer-coded variables in one np.bincount
+pass; percentages, margins, expected counts, chi-square and Cramér's V are
+all derived from the resulting table without recounting the data.
+"""
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+# chdtrc is the chi-square survival function behind scipy.stats.chi2.sf,
+# without the cost of importing all of scipy.stats
+from scipy.special import chdtrc
+
+# Label of the bucket that collects the long tail of a bounded table
+OTHER_LABEL = 'Other'
+
+# Cochran's rule: chi-square is unreliable if any expected count is below 1
+# or more than 20% of the expected counts are below 5
+MIN_EXPECTED = 1.0
+SMALL_EXPECTED = 5.0
+MAX_SMALL_EXPECTED_SHARE = 0.2
+
+# Monte Carlo test: resample limits, hard time budget (seconds), target 95%
+# CI half-width of the p-value, array elements per batch (bounds both the
+# permuted values and the counted tables) and size of the timing batch
+MONTE_CARLO_MIN_RESAMPLES = 1000
+MONTE_CARLO_MAX_RESAMPLES = 20000
+MONTE_CARLO_TIME_BUDGET = 0.5
+MONTE_CARLO_CI_HALF_WIDTH = 0.005
+MONTE_CARLO_BATCH_VALUES = 1_000_000
+MONTE_CARLO_FIRST_BATCH = 50
+
+
+class ContingencyTable:
+    """Observed counts of two categorical variables and the statistics derived from them."""
+
+    def __init__(self, counts: np.ndarray, row_labels: pd.Index, col_labels: pd.Index,
+                 other_rows: int = 0, other_cols: int = 0):
+        self.counts = counts
+        self.row_labels = row_labels
+        self.col_labels = col_labels
+        # Number of categories folded into the "Other" row / column
+        self.other_rows = other_rows
+        self.other_cols = other_cols
+        self._chi_square = {}
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def row_totals(self) -> np.ndarray:
+        return self.counts.sum(axis=1)
+
+    @property
+    def col_totals(self) -> np.ndarray:
+        return self.counts.sum(axis=0)
+
+    @property
+    def degrees_of_freedom(self) -> int:
+        return max(0, (self.counts.shape[0] - 1) * (self.counts.shape[1] - 1))
+
+    def with_margins(self) -> np.ndarray:
+        """Counts with a totals column and a totals row appended."""
+        rows, cols = self.counts.shape
+        table = np.zeros((rows + 1, cols + 1), dtype=np.int64)
+        table[:-1, :-1] = self.counts
+        table[:-1, -1] = self.row_totals
+        table[-1, :] = table[:-1, :].sum(axis=0)
+        return table
+
+    def percentages(self) -> np.ndarray:
+        """Counts with margins as percentages of the grand total."""
+        table = self.with_margins()
+        if self.total == 0:
+            return np.zeros(table.shape)
+        return table / self.total * 100
+
+    def expected(self) -> np.ndarray:
+        """Expected counts under independence."""
+        if self.total == 0:
+            return np.zeros(self.counts.shape)
+        return np.outer(self.row_totals, self.col_totals) / self.total
+
+    def chi_square(self, correction: bool = True) -> Tuple[float, float, int]:
+        """Pearson chi-square, p-value and degrees of freedom (Yates-corrected for 2x2, as scipy)."""
+        if correction not in self._chi_square:
+            dof = self.degrees_of_freedom
+            if dof == 0 or self.total == 0:
+                self._chi_square[correction] = (0.0, 1.0, dof)
+            else:
+                expected = self.expected()
+                observed = self.counts.astype(float)
+                if correction and dof == 1:
+                    diff = expected - observed
+                    observed = observed + np.minimum(0.5, np.abs(diff)) * np.sign(diff)
+                chi2 = float(((observed - expected) ** 2 / expected).sum())
+                self._chi_square[correction] = (chi2, float(chdtrc(dof, chi2)), dof)
+        return self._chi_square[correction]
+
+    def chi_square_monte_carlo(self, seed: int = 0, time_budget: float = MONTE_CARLO_TIME_BUDGET,
+                               max_resamples: int = MONTE_CARLO_MAX_RESAMPLES) -> Dict:
+        """
+        Monte Carlo permutation p-value of the (uncorrected) Pearson chi-square.
+
+        The column value of every observation is shuffled against its row
+        value, which keeps both margins fixed, for a whole batch of
+        permutations per array operation; each batch is counted with a single
+        bincount. A batch holds at most MONTE_CARLO_BATCH_VALUES permuted
+        values and table cells. Sampling stops once the 95% CI of the p-value
+        is narrower than MONTE_CARLO_CI_HALF_WIDTH, after max_resamples, or
+        when the time budget runs out: a small first batch times the
+        permutations and later batches are sized to fit the time left. If no
+        batch fits, the asymptotic p-value is returned (method 'asymptotic').
+        Results are cached per seed, budget and resample limit.
+        """
+        key = ('monte_carlo', seed, time_budget, max_resamples)
+        if key in self._chi_square:
+            return self._chi_square[key]
+
+        n = self.total
+        rows, cols = self.counts.shape
+        chi2, _, dof = self.chi_square(correction=False)
+        if dof == 0 or n == 0:
+            result = {'chi_square': chi2, 'p_value': 1.0, 'degrees_of_freedom': dof,
+                      'resamples': 0, 'p_value_ci': (1.0, 1.0), 'converged': True,
+                      'method': 'monte_carlo'}
+            self._chi_square[key] = result
+            return result
+
+        deadline = time.perf_counter() + time_budget
+        rng = np.random.default_rng(seed)
+        row_codes = np.repeat(np.arange(rows), self.row_totals)
+        col_codes = np.repeat(np.arange(cols), self.col_totals)
+        # Margins are fixed, so chi2 = sum(observed^2 / expected) - n for every permutation
+        inverse_expected = (1 / self.expected()).ravel()
+        # Relative tolerance so permutations equal to the observed table count as extreme
+        threshold = chi2 * (1 - 1e-9)
+        cells = rows * cols
+        batch = int(np.clip(MONTE_CARLO_BATCH_VALUES // max(n, cells), 1, MONTE_CARLO_MIN_RESAMPLES))
+
+        extreme = 0
+        resamples = 0
+        converged = False
+        seconds_per_resample = None
+        while resamples < max_resamples:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            size = min(batch, max_resamples - resamples)
+            if seconds_per_resample is None:
+                size = min(size, MONTE_CARLO_FIRST_BATCH)
+            else:
+                size = min(size, int(remaining / seconds_per_resample))
+                if size < 1:
+                    break
+
+            started = time.perf_counter()
+            shuffled = rng.permuted(np.tile(col_codes, (size, 1)), axis=1)
+            keys = (np.arange(size)[:, None] * cells + row_codes * cols + shuffled).ravel()
+            tables = np.bincount(keys, minlength=size * cells).reshape(size, cells)
+            statistics = (tables.astype(float) ** 2) @ inverse_expected - n
+            extreme += int((statistics >= threshold).sum())
+            resamples += size
+            seconds_per_resample = (time.perf_counter() - started) / size
+
+            p_value = (extreme + 1) / (resamples + 1)
+            half_width = 1.96 * np.sqrt(p_value * (1 - p_value) / resamples)
+            if resamples >= MONTE_CARLO_MIN_RESAMPLES and half_width <= MONTE_CARLO_CI_HALF_WIDTH:
+                converged = True
+                break
+
+        if resamples == 0:
+            # No time for a single batch: fall back to the asymptotic p-value
+            chi2, p_value, dof = self.chi_square(correction=False)
+            result = {'chi_square': chi2, 'p_value': p_value, 'degrees_of_freedom': dof,
+                      'resamples': 0, 'p_value_ci': (p_value, p_value), 'converged': False,
+                      'method': 'asymptotic'}
+            self._chi_square[key] = result
+            return result
+
+        result = {
+            'chi_square': chi2,
+            'p_value': float(p_value),
+            'degrees_of_freedom': dof,
+            'resamples': resamples,
+            'p_value_ci': (float(max(0.0, p_value - half_width)), float(min(1.0, p_value + half_width))),
+            'converged': converged,
+            'method': 'monte_carlo'
+        }
+        self._chi_square[key] = result
+        return result
+
+    def cramers_v(self) -> float:
+        """Cramér's V effect size."""
+        k = min(self.counts.shape) - 1
+        if k <= 0 or self.total == 0:
+            return 0.0
+        chi2, _, _ = self.chi_square()
+        return float(np.sqrt(chi2 / (self.total * k)))
+
+    def cramers_v_corrected(self) -> float:
+        """Bias-corrected Cramér's V (Bergsma, 2013), computed on the uncorrected chi-square."""
+        n = self.total
+        rows, cols = self.counts.shape
+        if n <= 1 or min(rows, cols) < 2:
+            return 0.0
+        chi2, _, _ = self.chi_square(correction=False)
+        phi2 = max(0.0, chi2 / n - (rows - 1) * (cols - 1) / (n - 1))
+        rows_corr = rows - (rows - 1) ** 2 / (n - 1)
+        cols_corr = cols - (cols - 1) ** 2 / (n - 1)
+        denominator = min(rows_corr - 1, cols_corr - 1)
+        return float(np.sqrt(phi2 / denominator)) if denominator > 0 else 0.0
+
+    def theils_u(self) -> Tuple[float, float]:
+        """
+        Theil's uncertainty coefficients (U(row | col), U(col | row)).
+
+        U(row | col) is the fraction of the row variable's entropy explained by
+        knowing the column variable; it is asymmetric.
+        """
+        n = self.total
+        if n == 0:
+            return 0.0, 0.0
+        joint = self.counts / n
+        p_rows = joint.sum(axis=1)
+        p_cols = joint.sum(axis=0)
+
+        def entropy(p):
+            p = p[p > 0]
+            return float(-(p * np.log(p)).sum())
+
+        h_rows, h_cols, h_joint = entropy(p_rows), entropy(p_cols), entropy(joint.ravel())
+        # Mutual information I = H(row) + H(col) - H(row, col)
+        mutual = h_rows + h_cols - h_joint
+        u_rows = mutual / h_rows if h_rows > 0 else 1.0
+        u_cols = mutual / h_cols if h_cols > 0 else 1.0
+        return float(u_rows), float(u_cols)
+
+    def min_expected(self) -> float:
+        return float(self.expected().min()) if self.counts.size else 0.0
+
+    def expected_count_warning(self) -> Optional[str]:
+        """Why the chi-square approximation is unreliable for this table, or None."""
+        if self.degrees_of_freedom == 0 or self.total == 0:
+            return None
+        expected = self.expected()
+        small_share = float((expected < SMALL_EXPECTED).mean())
+        if expected.min() < MIN_EXPECTED:
+            return (
+                f'Some expected counts are below {MIN_EXPECTED:g} '
+                f'(minimum {expected.min():.2f}); the chi-square p-value is unreliable. '
+                'Limit the number of categories with max_rows / max_cols.'
+            )
+        if small_share > MAX_SMALL_EXPECTED_SHARE:
+            return (
+                f'{small_share:.0%} of expected counts are below {SMALL_EXPECTED:g}; '
+                'the chi-square p-value is unreliable. '
+                'Limit the number of categories with max_rows / max_cols.'
+            )
+        return None
+
+    def bounded(self, max_rows: Optional[int] = None, max_cols: Optional[int] = None) -> 'ContingencyTable':
+        """
+        Table with at most max_rows rows and max_cols columns.
+
+        The most frequent categories are kept in their original order and the
+        long tail is summed into a trailing "Other" category, so totals are
+        unchanged and statistics are computed on the bounded table.
+        """
+        row_map, row_labels, other_rows = _bucket_axis(self.row_totals, self.row_labels, max_rows)
+        col_map, col_labels, other_cols = _bucket_axis(self.col_totals, self.col_labels, max_cols)
+        if not other_rows and not other_cols:
+            return self
+
+        counts = np.zeros((len(row_labels), len(col_labels)), dtype=self.counts.dtype)
+        np.add.at(counts, (row_map[:, None], col_map[None, :]), self.counts)
+        return ContingencyTable(counts, row_labels, col_labels, other_rows, other_cols)
+
+    def cells(self) -> List[Tuple[int, int, int]]:
+        """Non-zero cells as (row index, column index, count) triplets."""
+        rows, cols = np.nonzero(self.counts)
+        return list(zip(rows.tolist(), cols.tolist(), self.counts[rows, cols].tolist()))
+
+
+def _bucket_axis(totals: np.ndarray, labels: pd.Index, limit: Optional[int]) -> Tuple[np.ndarray, pd.Index, int]:
+    """
+    Bucket map of one table axis: position of each category in the bounded
+    axis, the bounded labels and how many categories went into "Other".
+    """
+    if limit is None or len(labels) <= limit:
+        return np.arange(len(labels)), labels, 0
+
+    # Keep the limit - 1 largest categories (ties in label order), Other is the
+    # last; a real "Other" category always goes into the bucket
+    order = np.argsort(-totals, kind='stable')
+    order = order[labels[order] != OTHER_LABEL]
+    keep = np.zeros(len(labels), dtype=bool)
+    keep[order[:limit - 1]] = True
+
+    bucket = np.empty(len(labels), dtype=np.intp)
+    bucket[keep] = np.arange(keep.sum())
+    bucket[~keep] = keep.sum()
+    return bucket, labels[keep].append(pd.Index([OTHER_LABEL])), int((~keep).sum())
+
+
+def build_contingency_tables(
+    pairs: Sequence[Tuple[str, str]],
+    encoded: Dict[str, Tuple[np.ndarray, pd.Index]]
+) -> Dict[Tuple[str, str], ContingencyTable]:
+    """
+    Count all pairs at once.
+
+    Each pair's cells get a disjoint range of bins (offset + row_code * n_cols
+    + col_code), so a single np.bincount over the concatenated codes yields
+    every table.
+
+    Args:
+        pairs: (row_var, col_var) tuples
+        encoded: Variable name -> (codes with -1 for missing, category labels)
+    """
+    chunks: List[np.ndarray] = []
+    layout = []
+    offset = 0
+    for row_var, col_var in pairs:
+        row_codes, row_labels = encoded[row_var]
+        col_codes, col_labels = encoded[col_var]
+        valid = (row_codes >= 0) & (col_codes >= 0)
+        chunks.append(offset + row_codes[valid] * len(col_labels) + col_codes[valid])
+        layout.append((row_var, col_var, offset, len(row_labels), len(col_labels)))
+        offset += len(row_labels) * len(col_labels)
+
+    if not layout:
+        return {}
+
+    bins = np.bincount(np.concatenate(chunks), minlength=offset)
+
+    tables = {}
+    for row_var, col_var, start, n_rows, n_cols in layout:
+        counts = bins[start:start + n_rows * n_cols].reshape(n_rows, n_cols)
+
+        # Keep only categories observed together with a value of the other variable
+        rows = counts.sum(axis=1) > 0
+        cols = counts.sum(axis=0) > 0
+        tables[(row_var, col_var)] = ContingencyTable(
+            counts[rows][:, cols],
+            encoded[row_var][1][rows],
+            encoded[col_var][1][cols]
+        )
+    return tables
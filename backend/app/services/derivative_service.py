@@ -0,0 +1,108 @@
+"""
+Image derivatives for PDF export.
+Originals are often 20+ MB TIFF/JPEG files, but a PDF page only needs
+enough pixels for the size the image is placed at. Derivatives are resampled
+to that size at the DPI of a quality preset, re-encoded as JPEG and cached
+on disk by media id, pixel size and quality.
+"""
+import io
+import math
+import os
+import uuid
+from typing import Optional, Tuple
+from PIL import Image
+
+POINTS_PER_INCH = 72
+
+
+def fit_size(width: float, height: float, max_width: float, max_height: float) -> Tuple[float, float]:
+    """Scale (width, height) down to fit the box, keeping the aspect ratio; never up."""
+    ratio = min(1.0, max_width / width, max_height / height)
+    return width * ratio, height * ratio
+
+
+def derivative_pixels(pixel_size: Tuple[int, int], placed: Tuple[float, float], dpi: int) -> Tuple[int, int]:
+    """Pixels needed to print an image at the placed size (points) and dpi, capped at the original."""
+    width, height = pixel_size
+    target_width = math.ceil(placed[0] / POINTS_PER_INCH * dpi)
+    if target_width >= width:
+        return width, height
+    return max(1, target_width), max(1, round(height * target_width / width))
+
+
+def image_pixels(data: bytes) -> Tuple[int, int]:
+    """Pixel size of image bytes, read from the header only."""
+    with Image.open(io.BytesIO(data)) as img:
+        return img.size
+
+
+def make_derivative(data: bytes, size: Tuple[int, int], jpeg_quality: int) -> bytes:
+    """Resample image bytes to the given pixel size as an RGB JPEG."""
+    with Image.open(io.BytesIO(data)) as img:
+        # JPEG decodes straight at a reduced scale, far cheaper than a full decode
+        img.draft('RGB', size)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, 'white')
+            background.paste(img, mask=img.getchannel('A'))
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        if img.size != size:
+            img = img.resize(size, Image.LANCZOS)
+
+        output = io.BytesIO()
+        img.save(output, 'JPEG', quality=jpeg_quality, optimize=True)
+        return output.getvalue()
+
+
+class DerivativeCache:
+    """Derivative JPEGs on disk, one file per (media id, pixel size, quality)."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, media_id: str, size: Tuple[int, int], jpeg_quality: int) -> str:
+        return os.path.join(self.directory, f'{media_id}_{size[0]}x{size[1]}_q{jpeg_quality}.jpg')
+
+    def get(self, media_id: str, size: Tuple[int, int], jpeg_quality: int) -> Optional[bytes]:
+        path = self._path(media_id, size, jpeg_quality)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        # Mark as recently used for prune()
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, media_id: str, size: Tuple[int, int], jpeg_quality: int, data: bytes):
+        # Write-then-rename, so concurrent exports never read a partial file
+        path = self._path(media_id, size, jpeg_quality)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        """Delete the least recently used derivatives beyond max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith('.jpg'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
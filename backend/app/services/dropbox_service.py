@@ -1,10 +1,55 @@
 import dropbox
+import requests
 from dropbox.files import WriteMode
 from flask import current_app
 import uuid
 import os
 from PIL import Image
 import io
+from typing import Callable, Iterable
+
+# Bytes read per chunk when streaming a file
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a failed download is worth retrying (network trouble, throttling, server errors)."""
+    return isinstance(error, (
+        dropbox.exceptions.InternalServerError,
+        dropbox.exceptions.RateLimitError,
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+        ConnectionError,
+        TimeoutError,
+    ))
+
+
+class ChunkStream:
+    """
+    Chunk iterator over an open file or HTTP response. Unlike a generator,
+    close() releases the source even if iteration never started; it is also
+    released once the chunks are exhausted or reading fails.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], close: Callable):
+        self._chunks = iter(chunks)
+        self._close = close
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self._close is not None:
+            close, self._close = self._close, None
+            close()
 
 
 class DropboxService:
@@ -172,6 +217,25 @@ class DropboxService:
 
         raise Exception('No storage backend available (configure Dropbox or local media path)')
 
+    def iter_file(self, dropbox_path: str, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> ChunkStream:
+        """
+        Stream a file from Dropbox or local storage in chunks.
+        The file is opened before returning, so a missing file raises here
+        rather than part-way through the iteration; callers that may stop
+        before the end must close() the stream.
+        """
+        if self.use_local and self.local_path:
+            local_file = self._get_local_path(dropbox_path)
+            if local_file and os.path.exists(local_file):
+                f = open(local_file, 'rb')
+                return ChunkStream(iter(lambda: f.read(chunk_size), b''), f.close)
+
+        if self.dbx:
+            _, response = self.dbx.files_download(dropbox_path)
+            return ChunkStream(response.iter_content(chunk_size), response.close)
+
+        raise Exception('No storage backend available (configure Dropbox or local media path)')
+
     def _get_local_path(self, dropbox_path: str) -> str:
         """Convert Dropbox path to local file path"""
         if not self.local_path:
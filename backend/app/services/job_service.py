@@ -0,0 +1,285 @@
+"""
+Durable background job queue.
+Jobs are rows in the jobs table. `flask worker` claims them with
+SELECT ... FOR UPDATE SKIP LOCKED, runs the handler registered for the job
+kind, writes the result blob to JOB_RESULTS_DIR and retries failures with
+exponential backoff. A running job's heartbeat is refreshed while it runs;
+jobs whose worker died are requeued once their lease expires, and result
+blobs are deleted after JOB_RESULT_TTL_HOURS.
+"""
+import os
+import shutil
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from flask import current_app, jsonify, send_file
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from werkzeug.utils import secure_filename
+from ..extensions import db
+from ..models import Job
+
+# Bounds of the priority a client may request
+MIN_PRIORITY = -100
+MAX_PRIORITY = 100
+
+# kind -> handler(params, progress) returning (filename, mimetype, data), where data
+# is bytes, a file object or an iterable of byte chunks
+_HANDLERS: Dict[str, Callable] = {}
+
+
+def job_handler(kind: str):
+    """Register the function that runs jobs of the given kind."""
+    def decorator(fn):
+        _HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def parse_priority(value) -> int:
+    """Job priority from request input, clamped to MIN_PRIORITY..MAX_PRIORITY."""
+    if isinstance(value, bool):
+        raise ValueError('priority must be an integer')
+    try:
+        priority = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('priority must be an integer')
+    return max(MIN_PRIORITY, min(priority, MAX_PRIORITY))
+
+
+def enqueue(kind: str, params: Dict, user_id: Optional[str] = None,
+            priority: int = 0, max_attempts: Optional[int] = None) -> Job:
+    """Queue a job and return it."""
+    job = Job(
+        kind=kind,
+        params=params,
+        priority=priority,
+        max_attempts=max_attempts or current_app.config.get('JOB_MAX_ATTEMPTS', 3),
+        created_by=user_id
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Requeue running jobs whose heartbeat is older than JOB_LEASE_TIMEOUT,
+    i.e. whose worker was killed; jobs out of attempts are failed instead.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config.get('JOB_LEASE_TIMEOUT', 120))
+    stale = Job.query.filter(
+        Job.status == 'running',
+        db.func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff
+    ).with_for_update(skip_locked=True).all()
+
+    for job in stale:
+        current_app.logger.warning(f'Job {job.id} ({job.kind}) lost its worker {job.worker_id}')
+        job.error = f'Worker {job.worker_id} stopped responding'
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = datetime.utcnow()
+        else:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return len(stale)
+
+
+def claim_next_job(worker_id: str) -> Optional[Job]:
+    """Lock and mark as running the highest-priority job that is due."""
+    requeue_stale_jobs()
+
+    job = Job.query.filter(
+        Job.status == 'queued',
+        Job.run_after <= datetime.utcnow()
+    ).order_by(
+        Job.priority.desc(), Job.created_at
+    ).with_for_update(skip_locked=True).first()
+
+    if job is None:
+        db.session.rollback()
+        return None
+
+    job.status = 'running'
+    job.attempts += 1
+    job.progress = 0
+    job.worker_id = worker_id
+    job.started_at = job.heartbeat_at = datetime.utcnow()
+    db.session.commit()
+    return job
+
+
+def run_job(job: Job):
+    """Run a claimed job and record its outcome."""
+    job_id = job.id
+    handler = _HANDLERS.get(job.kind)
+    heartbeat = _start_heartbeat(job_id)
+
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job kind {job.kind}')
+        filename, mimetype, data = handler(job.params or {}, _progress_reporter(job_id))
+        path = _store_result(job_id, filename, data)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Job {job_id} ({job.kind}) failed: {str(e)}')
+
+        job = db.session.get(Job, job_id)
+        job.error = str(e)
+        if job.attempts < job.max_attempts:
+            backoff = current_app.config.get('JOB_RETRY_BACKOFF', 30) * 2 ** (job.attempts - 1)
+            job.status = 'queued'
+            job.run_after = datetime.utcnow() + timedelta(seconds=backoff)
+        else:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return
+    finally:
+        heartbeat.set()
+
+    job = db.session.get(Job, job_id)
+    job.status = 'succeeded'
+    job.progress = 100
+    job.error = None
+    job.result_path = path
+    job.result_filename = filename
+    job.result_mimetype = mimetype
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _start_heartbeat(job_id: str) -> threading.Event:
+    """Refresh the job's heartbeat on its own connection until the returned event is set."""
+    stop = threading.Event()
+    engine = db.engine
+    logger = current_app.logger
+    interval = current_app.config.get('JOB_HEARTBEAT_INTERVAL', 15)
+    table = Job.__table__
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        table.update().where(table.c.id == job_id).values(heartbeat_at=datetime.utcnow())
+                    )
+            except Exception as e:
+                logger.warning(f'Job {job_id} heartbeat failed: {str(e)}')
+
+    threading.Thread(target=beat, name=f'job-heartbeat-{job_id}', daemon=True).start()
+    return stop
+
+
+def _progress_reporter(job_id: str) -> Callable[[float], None]:
+    """Progress callback writing on its own connection, outside the handler's transaction."""
+    last = {'value': -1}
+    table = Job.__table__
+
+    def report(percent: float):
+        value = max(0, min(99, int(percent)))
+        if value == last['value']:
+            return
+        last['value'] = value
+        with db.engine.begin() as connection:
+            connection.execute(table.update().where(table.c.id == job_id).values(progress=value))
+
+    return report
+
+
+def _store_result(job_id: str, filename: str, data) -> str:
+    """Write the job result to JOB_RESULTS_DIR/<job id>/<filename>."""
+    directory = os.path.join(current_app.config['JOB_RESULTS_DIR'], job_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, secure_filename(filename) or 'result')
+
+    with open(path, 'wb') as f:
+        if isinstance(data, (bytes, bytearray)):
+            f.write(data)
+        elif hasattr(data, 'read'):
+            data.seek(0)
+            shutil.copyfileobj(data, f)
+        else:
+            for chunk in data:
+                f.write(chunk)
+    return path
+
+
+def purge_expired_results() -> int:
+    """Delete the result blobs of jobs finished more than JOB_RESULT_TTL_HOURS ago."""
+    cutoff = datetime.utcnow() - timedelta(hours=current_app.config.get('JOB_RESULT_TTL_HOURS', 72))
+    expired = Job.query.filter(
+        Job.result_path.isnot(None),
+        Job.finished_at < cutoff
+    ).all()
+
+    for job in expired:
+        shutil.rmtree(os.path.dirname(job.result_path), ignore_errors=True)
+        job.result_path = None
+    db.session.commit()
+    return len(expired)
+
+
+def run_worker(poll_interval: float = 2.0, once: bool = False):
+    """Claim and run jobs until interrupted (or until the queue is empty with once)."""
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    current_app.logger.info(f'Job worker {worker_id} started')
+    # Expired results are purged at startup and then hourly
+    next_purge = 0.0
+
+    while True:
+        if time.monotonic() >= next_purge:
+            purge_expired_results()
+            next_purge = time.monotonic() + 3600
+
+        job = claim_next_job(worker_id)
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        run_job(job)
+        db.session.expire_all()
+
+
+def _get_accessible_job(job_id: str, kind_prefix: str):
+    """Load a job the current user may see, or return an error response."""
+    job = db.session.get(Job, job_id)
+    if not job or not job.kind.startswith(kind_prefix):
+        return None, (jsonify({'error': 'Job not found'}), 404)
+
+    if job.created_by != get_jwt_identity() and get_jwt().get('role') != 'admin':
+        return None, (jsonify({'error': 'Insufficient permissions'}), 403)
+
+    return job, None
+
+
+def job_status_response(job_id: str, kind_prefix: str):
+    """JSON status of a job."""
+    job, error = _get_accessible_job(job_id, kind_prefix)
+    if error:
+        return error
+    return jsonify(job.to_dict())
+
+
+def job_download_response(job_id: str, kind_prefix: str):
+    """Send the stored result of a finished job."""
+    job, error = _get_accessible_job(job_id, kind_prefix)
+    if error:
+        return error
+
+    if job.status != 'succeeded':
+        return jsonify({'error': f'Job is {job.status}', 'job': job.to_dict()}), 409
+
+    if not job.result_path or not os.path.exists(job.result_path):
+        return jsonify({'error': 'Job result is no longer available'}), 410
+
+    return send_file(
+        job.result_path,
+        mimetype=job.result_mimetype,
+        as_attachment=True,
+        download_name=job.result_filename
+    )
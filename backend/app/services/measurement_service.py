@@ -0,0 +1,211 @@
+"""
+Measurement extraction.
+Parses the free-text size_dimensions ("Maximum length 10.7 cm",
+"h 5 x w 3 x l 2 cm") and weight ("12 gr.") of an artifact into
+max_dimension_mm and weight_g, so artifacts can be filtered and sorted by
+size and weight and summarised numerically.
+Each value carries a confidence flag: 'high' when every figure had its own
+unit, 'low' when a unit was borrowed from another figure or assumed, or when
+the text held several competing values.
+"""
+import re
+from typing import Optional, Tuple
+from sqlalchemy import bindparam, event, func, inspect, select
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models import Artifact
+from .stats_service import invalidate_snapshots
+
+CONFIDENCE_HIGH = 'high'
+CONFIDENCE_LOW = 'low'
+
+# Millimetres per length unit; catalogue sizes without any unit are in cm
+LENGTH_UNITS = {'mm': 1.0, 'cm': 10.0, 'm': 1000.0, 'in': 25.4}
+DEFAULT_LENGTH_UNIT = 'cm'
+
+# Grams per weight unit ("gr." is grams in the catalogue, not grains)
+WEIGHT_UNITS = {'mg': 0.001, 'g': 1.0, 'kg': 1000.0, 'oz': 28.349523125, 'lb': 453.59237}
+DEFAULT_WEIGHT_UNIT = 'g'
+
+_LENGTH_UNIT = r'mm|cm|m|inch(?:es)?|in\b|"'
+_WEIGHT_UNIT = r'mg|kgs?|kilos?|kilograms?|grams?|grammes?|gms?|grs?|g|oz|ounces?|lbs?|pounds?'
+_MEASURE = re.compile(
+    rf'(?P<num>\d+(?:\.\d+)?)\s*(?:(?P<length>{_LENGTH_UNIT})|(?P<weight>{_WEIGHT_UNIT}))?(?![a-z])'
+)
+# Enumerators of the catalogue form: "a) max overall dimension ... b) other"
+_ENUMERATOR = re.compile(r'(?:^|(?<=[\s(]))[a-h]\)')
+
+
+def _normalize(text: str) -> str:
+    text = text.lower().replace('×', 'x').replace('″', '"')
+    text = _ENUMERATOR.sub(' ', text)
+    # Decimal commas ("10,7 cm") and thousands separators ("1,200 g")
+    text = re.sub(r'(\d),(\d{3})(?!\d)', r'\1\2', text)
+    return re.sub(r'(\d),(\d{1,2})(?!\d)', r'\1.\2', text)
+
+
+def _length_unit(unit: str) -> str:
+    return 'in' if unit.startswith('in') or unit == '"' else unit
+
+
+def _weight_unit(unit: str) -> str:
+    if unit == 'mg':
+        return 'mg'
+    if unit.startswith('k'):
+        return 'kg'
+    if unit == 'oz' or unit.startswith('ounce'):
+        return 'oz'
+    if unit.startswith('lb') or unit.startswith('pound'):
+        return 'lb'
+    return 'g'
+
+
+def parse_dimensions(text: Optional[str]) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Largest dimension in mm of a size text and its confidence, or (None, None).
+
+    Figures without a unit take the unit written after them ("5 x 3 cm"),
+    else the last unit seen, else centimetres; weights mixed into the text
+    are skipped.
+    """
+    if not text or not text.strip():
+        return None, None
+
+    values = []
+    pending = []
+    last_unit = None
+    confidence = CONFIDENCE_HIGH
+    for match in _MEASURE.finditer(_normalize(text)):
+        if match.group('weight'):
+            continue
+        num = float(match.group('num'))
+        if match.group('length') is None:
+            pending.append(num)
+            continue
+        last_unit = _length_unit(match.group('length'))
+        values.extend(v * LENGTH_UNITS[last_unit] for v in pending + [num])
+        pending = []
+
+    if pending:
+        confidence = CONFIDENCE_LOW
+        values.extend(v * LENGTH_UNITS[last_unit or DEFAULT_LENGTH_UNIT] for v in pending)
+    if not values:
+        return None, None
+    return round(max(values), 2), confidence
+
+
+def parse_weight(text: Optional[str]) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Weight in grams of a weight text and its confidence, or (None, None).
+
+    The first figure with a weight unit wins; a bare figure is read as grams.
+    """
+    if not text or not text.strip():
+        return None, None
+
+    explicit = []
+    bare = []
+    for match in _MEASURE.finditer(_normalize(text)):
+        if match.group('length'):
+            continue
+        num = float(match.group('num'))
+        if match.group('weight'):
+            explicit.append(num * WEIGHT_UNITS[_weight_unit(match.group('weight'))])
+        else:
+            bare.append(num * WEIGHT_UNITS[DEFAULT_WEIGHT_UNIT])
+
+    if explicit:
+        confidence = CONFIDENCE_HIGH if len(set(explicit)) == 1 and not bare else CONFIDENCE_LOW
+        return round(explicit[0], 3), confidence
+    if bare:
+        return round(bare[0], 3), CONFIDENCE_LOW
+    return None, None
+
+
+def measure_artifact(artifact: Artifact):
+    """Set max_dimension_mm / weight_g and their confidence from the free text."""
+    artifact.max_dimension_mm, artifact.dimension_confidence = parse_dimensions(artifact.size_dimensions)
+    artifact.weight_g, artifact.weight_confidence = parse_weight(artifact.weight)
+
+
+def _measure_changed_artifacts(session, flush_context, instances):
+    """Re-parse artifacts whose size or weight text is new or changed in this flush."""
+    for obj in (*session.new, *session.dirty):
+        if not isinstance(obj, Artifact):
+            continue
+        if obj in session.new:
+            measure_artifact(obj)
+            continue
+        attrs = inspect(obj).attrs
+        if attrs.size_dimensions.history.has_changes() or attrs.weight.history.has_changes():
+            measure_artifact(obj)
+
+
+def register_measurement_parsing():
+    """Install the flush hook that keeps the numeric measurements in step with the text."""
+    if not event.contains(Session, 'before_flush', _measure_changed_artifacts):
+        event.listen(Session, 'before_flush', _measure_changed_artifacts)
+
+
+def backfill_measurements(batch_size: int = 500) -> int:
+    """Re-parse the measurements of every artifact. Returns the number updated."""
+    table = Artifact.__table__
+    # Re-parsing is not an edit: updated_at is set to itself so that its
+    # onupdate default does not fire
+    stmt = table.update().where(table.c.id == bindparam('artifact_id')).values(
+        max_dimension_mm=bindparam('dimension'), dimension_confidence=bindparam('dimension_conf'),
+        weight_g=bindparam('grams'), weight_confidence=bindparam('weight_conf'),
+        updated_at=table.c.updated_at
+    )
+    query = select(
+        table.c.id, table.c.size_dimensions, table.c.weight,
+        table.c.max_dimension_mm, table.c.dimension_confidence,
+        table.c.weight_g, table.c.weight_confidence
+    ).order_by(table.c.id).limit(batch_size)
+
+    updated, last_id = 0, ''
+    while True:
+        rows = db.session.execute(query.where(table.c.id > last_id)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        changes = []
+        for row in rows:
+            dimension, dimension_conf = parse_dimensions(row.size_dimensions)
+            grams, weight_conf = parse_weight(row.weight)
+            if (dimension, dimension_conf, grams, weight_conf) != (
+                row.max_dimension_mm, row.dimension_confidence, row.weight_g, row.weight_confidence
+            ):
+                changes.append({
+                    'artifact_id': row.id, 'dimension': dimension, 'dimension_conf': dimension_conf,
+                    'grams': grams, 'weight_conf': weight_conf
+                })
+        if changes:
+            db.session.execute(stmt, changes)
+            invalidate_snapshots(db.session.connection())
+            updated += len(changes)
+        db.session.commit()
+
+    return updated
+
+
+def measurement_coverage():
+    """
+    Artifacts per confidence for each measurement, 'unparsed' counting
+    artifacts whose text is filled but yielded no value.
+    """
+    coverage = {}
+    for text_column, confidence_column in (
+        (Artifact.size_dimensions, Artifact.dimension_confidence),
+        (Artifact.weight, Artifact.weight_confidence),
+    ):
+        rows = db.session.execute(
+            select(confidence_column, func.count()).where(
+                text_column.isnot(None), text_column != ''
+            ).group_by(confidence_column)
+        ).all()
+        coverage[text_column.key] = {
+            (confidence or 'unparsed'): count for confidence, count in rows
+        }
+    return coverage
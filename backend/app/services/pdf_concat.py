@@ -0,0 +1,202 @@
+"""
+Streaming concatenation of PDF parts written by reportlab.
+reportlab writes a classic xref table, a flat page tree and direct stream
+lengths, so parts can be joined object by object: objects are renumbered,
+every page is re-parented to one new page tree, and stream data is copied
+through in chunks. Memory stays bounded by one object header plus the copy
+buffer, whatever the size of the parts. Objects are located through the
+cross-reference table only and every stream is checked against its /Length,
+so stream data is never scanned for PDF keywords. Not a general PDF merger:
+anything outside that layout (object or xref streams, several xref sections,
+incremental updates, encryption, indirect lengths, nested page trees) raises
+ValueError rather than producing a damaged file.
+"""
+import re
+import uuid
+from typing import BinaryIO, Dict, Iterable, List
+
+# Bytes read to find an object's dictionary; larger objects carry a stream
+HEAD_BYTES = 64 * 1024
+COPY_BUFFER = 1024 * 1024
+
+_REF = re.compile(rb'(\d+) 0 R\b')
+_OBJ_HEADER = re.compile(rb'\s*(\d+) 0 obj')
+# End of the stream dictionary and start of the data
+_STREAM = re.compile(rb'>>\s*stream\r?\n')
+_LENGTH = re.compile(rb'/Length (\d+)(?!\s+\d+\s+R)')
+_ENDSTREAM = re.compile(rb'\s*endstream\b')
+
+# Reserved object numbers of the merged document
+CATALOG, PAGES, INFO = 1, 2, 3
+
+
+class _Part:
+    """Cross-reference table, trailer and page list of one part."""
+
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(max(0, size - 1024))
+        tail = f.read()
+        matches = re.findall(rb'startxref\s+(\d+)', tail)
+        if not matches:
+            raise ValueError('Not a PDF: startxref not found')
+        self.xref_offset = int(matches[-1])
+
+        f.seek(self.xref_offset)
+        xref = f.read(size - self.xref_offset)
+        if not xref.startswith(b'xref'):
+            raise ValueError('Unsupported PDF: cross-reference stream')
+        table, _, trailer = xref.partition(b'trailer')
+        if b'/Prev' in trailer or b'/Encrypt' in trailer:
+            raise ValueError('Unsupported PDF: incremental update or encryption')
+        lines = table.split()
+        first, count = int(lines[1]), int(lines[2])
+        entries = lines[3:]
+        if len(entries) != 3 * count:
+            raise ValueError('Unsupported PDF: several cross-reference sections')
+        self.offsets = {
+            first + i: int(entries[3 * i])
+            for i in range(count) if entries[3 * i + 2] == b'n'
+        }
+
+        self.root = int(re.search(rb'/Root (\d+) 0 R', trailer).group(1))
+        info = re.search(rb'/Info (\d+) 0 R', trailer)
+        self.info = int(info.group(1)) if info else None
+
+        # Object extents: each object runs to the next one, the last to the xref
+        bounds = sorted(self.offsets.values()) + [self.xref_offset]
+        self.ends = {offset: end for offset, end in zip(bounds, bounds[1:])}
+
+        catalog = self._head(self.root)
+        self.pages = int(re.search(rb'/Pages (\d+) 0 R', catalog).group(1))
+        pages = self._head(self.pages, whole=True)
+        kids = re.search(rb'/Kids\s*\[([^\]]*)\]', pages).group(1)
+        self.kids = [int(n) for n in _REF.findall(kids)]
+
+    def _head(self, num: int, whole: bool = False) -> bytes:
+        offset = self.offsets[num]
+        length = self.ends[offset] - offset
+        self.f.seek(offset)
+        return self.f.read(length if whole else min(HEAD_BYTES, length))
+
+    def copy_object(self, num: int, new_num: int, mapping: Dict[int, int], output: BinaryIO) -> int:
+        """Write object num renumbered as new_num; returns the bytes written."""
+        offset = self.offsets[num]
+        length = self.ends[offset] - offset
+        head = self._head(num)
+
+        header = _OBJ_HEADER.match(head)
+        if not header or int(header.group(1)) != num:
+            raise ValueError(f'Unsupported PDF: object {num} is not at its cross-reference offset')
+        stream = _STREAM.search(head, header.end())
+        # The dictionary ends with its closing '>>'; the stream keyword and data follow
+        split = stream.start() + 2 if stream else len(head)
+        if not stream and length > len(head):
+            raise ValueError(f'Object {num} is too large and has no stream')
+
+        dictionary = head[header.end():split]
+        if b'/Type /Pages' in dictionary:
+            raise ValueError('Unsupported PDF: nested page tree')
+        if stream:
+            self._check_stream(num, dictionary, offset + stream.end(), offset + length)
+            self.f.seek(offset + len(head))
+
+        def renumber(match):
+            ref = int(match.group(1))
+            if ref not in mapping:
+                raise ValueError(f'Unsupported PDF: object {num} refers to missing object {ref}')
+            return b'%d 0 R' % mapping[ref]
+
+        dictionary = _REF.sub(renumber, dictionary)
+
+        written = output.write(b'%d 0 obj' % new_num + dictionary)
+        # Stream data (and the rest of a large object) is copied through unchanged
+        output.write(head[split:])
+        written += len(head) - split
+        remaining = length - len(head)
+        while remaining > 0:
+            chunk = self.f.read(min(COPY_BUFFER, remaining))
+            if not chunk:
+                break
+            output.write(chunk)
+            written += len(chunk)
+            remaining -= len(chunk)
+        return written
+
+    def _check_stream(self, num: int, dictionary: bytes, start: int, end: int):
+        """Check that the stream data starting at start runs /Length bytes to endstream, before end."""
+        declared = _LENGTH.search(dictionary)
+        if not declared:
+            raise ValueError(f'Unsupported PDF: stream {num} has no direct /Length')
+        data_end = start + int(declared.group(1))
+        self.f.seek(data_end)
+        if data_end > end or not _ENDSTREAM.match(self.f.read(32)):
+            raise ValueError(f'Unsupported PDF: stream {num} does not match its /Length')
+
+
+def page_count(path: str) -> int:
+    """Number of pages of a reportlab PDF."""
+    with open(path, 'rb') as f:
+        return len(_Part(f).kids)
+
+
+def concatenate_pdfs(paths: Iterable[str], output: BinaryIO):
+    """Write the pages of the given PDFs, in order, as one PDF to output."""
+    position = output.write(b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n')
+    offsets: Dict[int, int] = {}
+    kids: List[int] = []
+    next_num = INFO + 1
+    has_info = False
+
+    for index, path in enumerate(paths):
+        with open(path, 'rb') as f:
+            part = _Part(f)
+
+            # The part's catalog and page tree are replaced; the first part's info is kept
+            mapping = {part.pages: PAGES, part.root: CATALOG}
+            if part.info is not None:
+                mapping[part.info] = INFO
+            for num in sorted(part.offsets):
+                if num not in mapping:
+                    mapping[num] = next_num
+                    next_num += 1
+
+            for num in sorted(part.offsets):
+                if num in (part.pages, part.root):
+                    continue
+                if num == part.info:
+                    if index > 0:
+                        continue
+                    has_info = True
+                offsets[mapping[num]] = position
+                position += part.copy_object(num, mapping[num], mapping, output)
+
+            kids.extend(mapping[num] for num in part.kids)
+
+    trailer_objects = [
+        (CATALOG, b'<<\n/PageMode /UseNone /Pages %d 0 R /Type /Catalog\n>>' % PAGES),
+        (PAGES, b'<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>' % (
+            len(kids), b' '.join(b'%d 0 R' % num for num in kids))),
+    ]
+    if not has_info:
+        trailer_objects.append((INFO, b'<<\n/Producer (ReportLab PDF Library)\n>>'))
+    for num, body in trailer_objects:
+        offsets[num] = position
+        position += output.write(b'%d 0 obj\n' % num + body + b'\nendobj\n')
+
+    size = next_num
+    xref_offset = position
+    output.write(b'xref\n0 %d\n0000000000 65535 f \n' % size)
+    for num in range(1, size):
+        if num in offsets:
+            output.write(b'%010d 00000 n \n' % offsets[num])
+        else:
+            output.write(b'0000000000 65535 f \n')
+
+    document_id = uuid.uuid4().hex.encode()
+    output.write(
+        b'trailer\n<<\n/ID [<%s><%s>]\n/Info %d 0 R\n/Root %d 0 R\n/Size %d\n>>\nstartxref\n%d\n%%%%EOF\n'
+        % (document_id, document_id, INFO, CATALOG, size, xref_offset)
+    )
@@ -8,8 +8,21 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER
 import io
+import os
+import tempfile
+from typing import BinaryIO, Dict, List, Optional
 from flask import current_app
+from sqlalchemy import bindparam
+from ..extensions import db
+from ..models import Media
 from .dropbox_service import DropboxService
+from .derivative_service import DerivativeCache, derivative_pixels, fit_size, image_pixels, make_derivative
+from .pdf_concat import concatenate_pdfs, page_count
+from .prefetch import export_prefetcher
+
+# Box the primary image is fitted into on an artifact page
+IMAGE_MAX_WIDTH = 15*cm
+IMAGE_MAX_HEIGHT = 10*cm
 
 
 class PDFService:
@@ -58,11 +71,88 @@ class PDFService:
             alignment=TA_CENTER
         ))
 
-    def generate_artifact_pdf(self, artifacts: list, include_images: bool = True) -> bytes:
-        """Generate a PDF with artifact information and images"""
-        buffer = io.BytesIO()
+    def write_artifact_pdf(self, output: BinaryIO, artifacts: list, include_images: bool = True, progress=None,
+                           quality: Optional[str] = None, chunk_size: Optional[int] = None,
+                           media: Optional[Dict[str, List[Media]]] = None):
+        """Render a PDF with artifact information and images into a binary file
+
+        The document is laid out in chunks of chunk_size artifacts (default
+        PDF_CHUNK_ARTIFACTS). Each chunk is built to its own part file on
+        disk, numbered on from the previous one, and the parts are then
+        concatenated into output, so only one chunk's story is in memory.
+
+        Args:
+            progress: Optional callback receiving the completion percentage
+            quality: Image preset of PDF_IMAGE_PRESETS ('screen', 'print');
+                     defaults to PDF_DEFAULT_PRESET
+            media: Preloaded artifact id -> media map (Media.by_artifact);
+                   loaded here in one query when not given
+        """
+        preset = self._image_preset(quality)
+        derivatives = DerivativeCache(
+            current_app.config['PDF_DERIVATIVE_CACHE_DIR'],
+            current_app.config['PDF_DERIVATIVE_CACHE_MAX_MB'] * 1024 * 1024
+        )
+        chunk_size = max(1, chunk_size or current_app.config['PDF_CHUNK_ARTIFACTS'])
+        if include_images and media is None:
+            media = Media.by_artifact(artifact.id for artifact in artifacts)
+
+        # Primary images download in parallel, ahead of the page being laid out
+        sources = [self._image_source(media.get(artifact.id, [])) if include_images else None
+                   for artifact in artifacts]
+        fetched = export_prefetcher(
+            lambda source: source and self._fetch_image(source, preset['dpi'], preset['jpeg_quality'], derivatives)
+        ).iter((source, source) for source in sources)
+
+        with tempfile.TemporaryDirectory(prefix='museum_pdf_') as parts_dir:
+            parts = []
+            pages = 0
+            pixel_sizes = []
+            try:
+                # The first chunk also carries the title page
+                for start in range(0, max(1, len(artifacts)), chunk_size):
+                    story = self._title_page(len(artifacts)) if start == 0 else []
+                    for artifact in artifacts[start:start + chunk_size]:
+                        source, image, error = next(fetched)
+                        if error is not None:
+                            current_app.logger.error(f'Image load error: {str(error)}')
+                        if image:
+                            data, placed, pixel_size = image
+                            if not (source[2] and source[3]):
+                                pixel_sizes.append({'media_id': source[0], 'pixel_width': pixel_size[0],
+                                                    'pixel_height': pixel_size[1]})
+                            image = data, placed
+                        self._add_artifact_page(story, artifact, image)
+                    self._record_pixel_sizes(pixel_sizes)
+
+                    path = os.path.join(parts_dir, f'part_{len(parts):05d}.pdf')
+                    self._build_part(path, story, first_page=pages + 1)
+                    parts.append(path)
+                    pages += page_count(path)
+
+                    if progress and artifacts:
+                        # Leave headroom for concatenating the parts
+                        progress(min(start + chunk_size, len(artifacts)) / len(artifacts) * 95)
+            finally:
+                fetched.close()
+
+            concatenate_pdfs(parts, output)
+
+        derivatives.prune()
+
+    def _title_page(self, total: int) -> list:
+        return [
+            Spacer(1, 2*inch),
+            Paragraph("Museum Collection Export", self.styles['Title']),
+            Spacer(1, 0.5*inch),
+            Paragraph(f"Total artifacts: {total}", self.styles['CenteredText']),
+            PageBreak()
+        ]
+
+    def _build_part(self, path: str, story: list, first_page: int):
+        """Lay out one chunk into a PDF file whose pages are numbered from first_page"""
         doc = SimpleDocTemplate(
-            buffer,
+            path,
             pagesize=A4,
             rightMargin=1.5*cm,
             leftMargin=1.5*cm,
@@ -70,30 +160,81 @@ class PDFService:
             bottomMargin=2*cm
         )
 
-        story = []
+        def draw_page_number(canvas, doc):
+            number = first_page + doc.page - 1
+            if number > 1:  # The title page stays unnumbered
+                canvas.saveState()
+                canvas.setFont('Helvetica', 8)
+                canvas.setFillColor(colors.HexColor('#718096'))
+                canvas.drawCentredString(A4[0] / 2, 1*cm, str(number))
+                canvas.restoreState()
 
-        # Title page
-        story.append(Spacer(1, 2*inch))
-        story.append(Paragraph(
-            "Museum Collection Export",
-            self.styles['Title']
-        ))
-        story.append(Spacer(1, 0.5*inch))
-        story.append(Paragraph(
-            f"Total artifacts: {len(artifacts)}",
-            self.styles['CenteredText']
-        ))
-        story.append(PageBreak())
+        doc.build(story, onFirstPage=draw_page_number, onLaterPages=draw_page_number)
+
+    @staticmethod
+    def _image_preset(quality: Optional[str]) -> dict:
+        presets = current_app.config['PDF_IMAGE_PRESETS']
+        quality = quality or current_app.config['PDF_DEFAULT_PRESET']
+        if quality not in presets:
+            raise ValueError(f'Unknown quality preset: {quality}')
+        return presets[quality]
+
+    @staticmethod
+    def _image_source(media: List[Media]):
+        """What a prefetch thread needs to produce the primary image of an artifact's media, or None"""
+        primary = Media.pick_primary(media)
+        if not primary:
+            return None
+        return primary.id, primary.dropbox_path, primary.width, primary.height
 
-        for artifact in artifacts:
-            self._add_artifact_page(story, artifact, include_images)
+    @staticmethod
+    def _record_pixel_sizes(pixel_sizes: List[Dict]):
+        """
+        Store pixel sizes learned from downloads on media that had none
+        (e.g. bulk imports), so later exports can find their derivatives in
+        the cache without downloading. Written on its own connection, so the
+        export's session and loaded artifacts are left untouched.
+        """
+        if not pixel_sizes:
+            return
+        table = Media.__table__
+        with db.engine.begin() as connection:
+            connection.execute(
+                table.update().where(table.c.id == bindparam('media_id')).values(
+                    width=bindparam('pixel_width'), height=bindparam('pixel_height')
+                ),
+                pixel_sizes
+            )
+        pixel_sizes.clear()
 
-        doc.build(story)
-        buffer.seek(0)
-        return buffer.read()
+    def _fetch_image(self, source, dpi: int, jpeg_quality: int, derivatives: DerivativeCache):
+        """
+        Runs on a prefetch thread: (derivative JPEG bytes, placed size in
+        points, original pixel size). The image is placed at its pixel size
+        in points, fitted into the image box, and resampled to that size at
+        the preset's DPI. With the pixel size recorded on the media, a cached
+        derivative skips the download.
+        """
+        media_id, dropbox_path, width, height = source
+        if width and height:
+            placed = fit_size(width, height, IMAGE_MAX_WIDTH, IMAGE_MAX_HEIGHT)
+            cached = derivatives.get(media_id, derivative_pixels((width, height), placed, dpi), jpeg_quality)
+            if cached is not None:
+                return cached, placed, (width, height)
 
-    def _add_artifact_page(self, story: list, artifact, include_images: bool):
-        """Add artifact details to PDF"""
+        data = self.dropbox.download_file(dropbox_path)
+        pixel_size = image_pixels(data)
+        placed = fit_size(*pixel_size, IMAGE_MAX_WIDTH, IMAGE_MAX_HEIGHT)
+        size = derivative_pixels(pixel_size, placed, dpi)
+        derivative = make_derivative(data, size, jpeg_quality)
+        try:
+            derivatives.put(media_id, size, jpeg_quality, derivative)
+        except OSError:
+            pass  # A full or read-only cache only costs the next export a resample
+        return derivative, placed, pixel_size
+
+    def _add_artifact_page(self, story: list, artifact, image: Optional[tuple] = None):
+        """Add artifact details to PDF, with the primary image (JPEG bytes, placed size) if any"""
         # Title
         story.append(Paragraph(
             f"{artifact.sequence_number}: {artifact.object_type or 'Artifact'}",
@@ -101,36 +242,16 @@ class PDFService:
         ))
 
         # Primary image
-        if include_images:
-            primary = artifact.primary_media
-            if primary:
-                try:
-                    img_data = self.dropbox.download_file(primary.dropbox_path)
-                    img = Image(io.BytesIO(img_data))
-
-                    # Scale to fit
-                    max_width = 15*cm
-                    max_height = 10*cm
-                    img_width, img_height = img.drawWidth, img.drawHeight
-
-                    if img_width > max_width:
-                        ratio = max_width / img_width
-                        img_width = max_width
-                        img_height = img_height * ratio
-
-                    if img_height > max_height:
-                        ratio = max_height / img_height
-                        img_height = max_height
-                        img_width = img_width * ratio
-
-                    img.drawWidth = img_width
-                    img.drawHeight = img_height
-                    img.hAlign = 'CENTER'
-
-                    story.append(img)
-                    story.append(Spacer(1, 0.3*inch))
-                except Exception as e:
-                    current_app.logger.error(f'Image load error: {str(e)}')
+        if image:
+            try:
+                img_data, (img_width, img_height) = image
+                img = Image(io.BytesIO(img_data), width=img_width, height=img_height)
+                img.hAlign = 'CENTER'
+
+                story.append(img)
+                story.append(Spacer(1, 0.3*inch))
+            except Exception as e:
+                current_app.logger.error(f'Image load error: {str(e)}')
 
         # Identification section
         story.append(Paragraph("Identification", self.styles['SectionHeader']))
@@ -0,0 +1,101 @@
+"""
+Ordered parallel prefetching for exports.
+Downloads run on a small thread pool while the export writer consumes the
+results one by one in submission order. At most queue_size results are in
+flight or waiting, so memory stays bounded however long the export is.
+"""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+from flask import current_app
+
+
+class Prefetcher:
+    """
+    Runs fetch(arg) for a stream of (tag, arg) pairs on worker threads and
+    yields (tag, result, error) in the same order.
+
+    Pairs are pulled from the iterable and submitted in the consumer's
+    thread, so building the args may touch the database; fetch itself runs
+    on a worker and must not. Failures that is_retryable accepts are retried
+    with exponential backoff; the last error is returned, not raised.
+    When the consumer stops early, release is called with every result it
+    will not receive (e.g. to close open downloads), including results of
+    fetches still running at that point.
+    """
+
+    def __init__(self, fetch: Callable[[Any], Any], concurrency: int = 4, queue_size: Optional[int] = None,
+                 retries: int = 2, backoff: float = 0.5,
+                 is_retryable: Callable[[Exception], bool] = lambda error: True,
+                 release: Optional[Callable[[Any], None]] = None):
+        self.fetch = fetch
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(self.concurrency, queue_size or 2 * self.concurrency)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.is_retryable = is_retryable
+        self.release = release
+
+    def _fetch_with_retries(self, arg) -> Tuple[Any, Optional[Exception]]:
+        for attempt in range(self.retries + 1):
+            try:
+                return self.fetch(arg), None
+            except Exception as e:
+                if attempt == self.retries or not self.is_retryable(e):
+                    return None, e
+                # Honour a server-requested delay (e.g. Dropbox rate limiting)
+                time.sleep(getattr(e, 'backoff', None) or self.backoff * 2 ** attempt)
+
+    def iter(self, jobs: Iterable[Tuple[Any, Any]]) -> Iterator[Tuple[Any, Any, Optional[Exception]]]:
+        """Fetch the args of (tag, arg) pairs ahead of the consumer; yield (tag, result, error) in order."""
+        jobs = iter(jobs)
+        pending = deque()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='prefetch')
+
+        def fill(size):
+            while len(pending) < size:
+                job = next(jobs, None)
+                if job is None:
+                    return
+                tag, arg = job
+                pending.append((tag, executor.submit(self._fetch_with_retries, arg)))
+
+        try:
+            fill(self.queue_size)
+            while pending:
+                # queue_size fetches stay ahead of the one handed out next,
+                # which leaves pending only once its result is in hand
+                fill(self.queue_size + 1)
+                tag, future = pending.popleft()
+                result, error = future.result()
+                yield tag, result, error
+        finally:
+            # The consumer stopped early or failed: drop what has not started
+            # and release what has, now or when it finishes
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.release is not None:
+                for _, future in pending:
+                    if not future.cancelled():
+                        future.add_done_callback(self._release_result)
+
+    def _release_result(self, future):
+        result, error = future.result()
+        if error is None:
+            self.release(result)
+
+
+def export_prefetcher(fetch: Callable[[Any], Any], **kwargs) -> Prefetcher:
+    """Prefetcher for media downloads, configured from EXPORT_FETCH_* settings."""
+    from .dropbox_service import is_transient_error
+
+    config = current_app.config
+    options = {
+        'concurrency': config.get('EXPORT_FETCH_CONCURRENCY', 8),
+        'queue_size': config.get('EXPORT_FETCH_QUEUE', 16),
+        'retries': config.get('EXPORT_FETCH_RETRIES', 2),
+        'backoff': config.get('EXPORT_FETCH_RETRY_BACKOFF', 0.5),
+        'is_retryable': is_transient_error,
+    }
+    options.update(kwargs)
+    return Prefetcher(fetch, **options)
@@ -0,0 +1,104 @@
+"""
+Artifact search predicates.
+The q / filter syntax of /api/search compiled into SQL WHERE clauses, so the
+same query can drive the search page and the analytics loader.
+date_from / date_to select artifacts whose parsed chronology range overlaps
+the given years (negative years are BCE); size_min / size_max (mm) and
+weight_min / weight_max (g) are ranges on the parsed measurements.
+"""
+import math
+from typing import Dict, List, Mapping
+from sqlalchemy import or_
+from ..models import Artifact
+
+# Columns matched by the free-text query
+SEARCH_COLUMNS = (
+    'sequence_number', 'accession_number', 'object_type', 'material',
+    'description_catalogue', 'description_observation', 'inscription',
+    'findspot', 'remarks'
+)
+
+# Columns filtered by case-insensitive substring
+SUBSTRING_FILTERS = ('object_type', 'material', 'chronology')
+
+# Numeric range filters: parameter -> (column, bound)
+RANGE_FILTERS = {
+    'size_min': ('max_dimension_mm', 'min'),
+    'size_max': ('max_dimension_mm', 'max'),
+    'weight_min': ('weight_g', 'min'),
+    'weight_max': ('weight_g', 'max'),
+}
+
+
+def normalize_search_params(params: Mapping) -> Dict:
+    """
+    Canonical form of the search parameters in a query string or JSON body.
+
+    Empty values are dropped and text is lower-cased (matching is
+    case-insensitive anyway), so equivalent requests give equal dictionaries.
+    """
+    normalized = {}
+
+    q = params.get('q')
+    if q:
+        normalized['q'] = str(q).lower()
+
+    for field in SUBSTRING_FILTERS:
+        value = params.get(field)
+        if value:
+            normalized[field] = str(value).lower()
+
+    for field in ('date_from', 'date_to'):
+        value = params.get(field)
+        if value not in (None, ''):
+            try:
+                normalized[field] = int(value)
+            except (TypeError, ValueError):
+                pass
+
+    for field in RANGE_FILTERS:
+        value = params.get(field)
+        if value not in (None, ''):
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                continue
+            if math.isfinite(value):
+                normalized[field] = value
+
+    on_display = params.get('on_display')
+    if on_display is not None:
+        normalized['on_display'] = on_display if isinstance(on_display, bool) else str(on_display).lower() == 'true'
+
+    return normalized
+
+
+def search_conditions(filters: Mapping) -> List:
+    """WHERE clauses for normalized search parameters."""
+    conditions = []
+
+    q = filters.get('q')
+    if q:
+        search_term = f'%{q}%'
+        conditions.append(or_(*[getattr(Artifact, column).ilike(search_term) for column in SEARCH_COLUMNS]))
+
+    for field in SUBSTRING_FILTERS:
+        if filters.get(field):
+            conditions.append(getattr(Artifact, field).ilike(f'%{filters[field]}%'))
+
+    # Range overlap on the indexed date columns; undated artifacts never match
+    if filters.get('date_from') is not None:
+        conditions.append(Artifact.date_end >= filters['date_from'])
+    if filters.get('date_to') is not None:
+        conditions.append(Artifact.date_start <= filters['date_to'])
+
+    # Bounds are inclusive; artifacts without a parsed value never match
+    for field, (column, bound) in RANGE_FILTERS.items():
+        if filters.get(field) is not None:
+            column = getattr(Artifact, column)
+            conditions.append(column >= filters[field] if bound == 'min' else column <= filters[field])
+
+    if filters.get('on_display') is not None:
+        conditions.append(Artifact.on_display == filters['on_display'])
+
+    return conditions
@@ -0,0 +1,118 @@
+"""
+Statistics snapshot store.
+Stats endpoints read one precomputed row per endpoint and collection; writes to
+the underlying tables only flag the rows as stale, and a stale row is rebuilt
+by the next reader once the debounce window has passed.
+"""
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Callable, Dict, Optional
+from flask import current_app
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..extensions import db
+from ..models import StatsSnapshot, Artifact, Media, Annotation, User, Submission
+
+# Models whose writes can change any of the stats payloads
+_TRACKED_MODELS = (Artifact, Media, Annotation, User, Submission)
+
+
+def get_snapshot(kind: str, collection: Optional[str], builder: Callable[[], Dict],
+                 fresh: bool = False) -> Dict:
+    """
+    Return the stats payload for an endpoint, rebuilding it when needed.
+
+    Args:
+        kind: Endpoint name (dashboard, collection, catalog)
+        collection: Collection key, or None for the combined museums
+        builder: Callable computing the payload from the live tables
+        fresh: Force recomputation regardless of the stored snapshot
+    """
+    key = collection or ''
+    snapshot = db.session.get(StatsSnapshot, (kind, key))
+
+    if snapshot is not None and not fresh and not _needs_refresh(snapshot):
+        return snapshot.payload
+
+    # An invalidation committed while the builder runs bumps the version,
+    # and the snapshot stored below then stays stale
+    seen = snapshot.version if snapshot is not None else None
+    payload = builder()
+    now = datetime.utcnow()
+
+    if snapshot is None:
+        db.session.add(StatsSnapshot(
+            kind=kind, collection=key, payload=payload, is_stale=False, computed_at=now
+        ))
+    else:
+        table = StatsSnapshot.__table__
+        db.session.execute(
+            table.update()
+            .where(table.c.kind == kind, table.c.collection == key)
+            .values(payload=payload, computed_at=now, is_stale=table.c.version != seen)
+        )
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker stored the same snapshot first
+        db.session.rollback()
+
+    return payload
+
+
+def _needs_refresh(snapshot: StatsSnapshot) -> bool:
+    """Stale snapshots are rebuilt at most once per debounce window."""
+    if not snapshot.is_stale:
+        return False
+    if snapshot.computed_at is None:
+        return True
+    debounce = timedelta(seconds=current_app.config.get('STATS_SNAPSHOT_DEBOUNCE', 30))
+    return datetime.utcnow() - snapshot.computed_at >= debounce
+
+
+def _mark_snapshots_stale(session, flush_context):
+    """Flag the snapshots affected by the objects written in this flush."""
+    collections = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Artifact):
+            collections.add(obj.collection or '')
+            # An artifact moved between collections changes both of them
+            collections.update(old or '' for old in inspect(obj).attrs.collection.history.deleted)
+        elif isinstance(obj, _TRACKED_MODELS):
+            # Media, annotations, users and submissions are not tied to a
+            # collection without an extra lookup: invalidate everything
+            collections = None
+            break
+    else:
+        if not collections:
+            return
+
+    invalidate_snapshots(session.connection(), collections)
+
+
+def invalidate_snapshots(connection, collections=None):
+    """
+    Flag snapshots as stale and bump their version.
+
+    Writes that bypass the ORM flush (bulk core updates) call this
+    themselves, on the connection they wrote with.
+
+    Args:
+        connection: Connection of the transaction making the write
+        collections: Collections whose snapshots are affected, or None for all
+    """
+    table = StatsSnapshot.__table__
+    stmt = table.update().values(is_stale=True, version=table.c.version + 1)
+    if collections is not None:
+        # The combined ('') rows include every collection
+        collections = set(collections) | {''}
+        stmt = stmt.where(or_(table.c.collection.in_(collections), table.c.kind != 'catalog'))
+    connection.execute(stmt)
+
+
+def register_snapshot_invalidation():
+    """Install the flush hook that keeps snapshots in step with writes."""
+    if not event.contains(Session, 'after_flush', _mark_snapshots_stale):
+        event.listen(Session, 'after_flush', _mark_snapshots_stale)
@@ -0,0 +1,172 @@
+"""
+Full-catalogue Excel export.
+The workbook is written in xlsxwriter's constant_memory mode, where each row
+is flushed to a temporary file as soon as the next one starts, and rows come
+from server-side cursors (yield_per). Memory stays flat however many
+artifacts the catalogue holds.
+"""
+import json
+import re
+from typing import BinaryIO, List
+import xlsxwriter
+from sqlalchemy import func, select
+from ..extensions import db
+from ..models import Artifact, Media
+
+# Rows fetched per round trip from the server-side cursor
+XLSX_BATCH_SIZE = 1000
+
+MEDIA_SHEET = 'Media'
+
+# Excel limits
+MAX_CELL_CHARS = 32767
+MAX_SHEET_NAME = 31
+
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+def _cell_kind(column) -> str:
+    """How values of a table column are written: number, boolean, datetime, json or string"""
+    if isinstance(column.type, db.Boolean):
+        return 'boolean'
+    if isinstance(column.type, (db.Integer, db.Float)):
+        return 'number'
+    if isinstance(column.type, db.DateTime):
+        return 'datetime'
+    if isinstance(column.type, db.JSON):
+        return 'json'
+    return 'string'
+
+
+def _sheet_name(collection: str, used: set) -> str:
+    """Valid, unique worksheet name for a collection"""
+    base = _INVALID_SHEET_CHARS.sub('_', collection or 'unassigned').strip("'")[:MAX_SHEET_NAME] or 'unassigned'
+    name, n = base, 2
+    while name.lower() in used:
+        suffix = f' ({n})'
+        name, n = base[:MAX_SHEET_NAME - len(suffix)] + suffix, n + 1
+    used.add(name.lower())
+    return name
+
+
+class _Sheet:
+    """A worksheet with its column kinds and the last row written"""
+
+    def __init__(self, worksheet, kinds: List[str]):
+        self.worksheet = worksheet
+        self.kinds = kinds
+        self.last_row = 0
+
+
+class XlsxService:
+    """Writes the artifacts of an export query as a typed workbook"""
+
+    def __init__(self, output: BinaryIO):
+        self.workbook = xlsxwriter.Workbook(output, {
+            'constant_memory': True,
+            # Catalogue text is data: never turn it into links or formulas
+            'strings_to_urls': False,
+            'strings_to_formulas': False
+        })
+        self.formats = {
+            'header': self.workbook.add_format({
+                'bold': True, 'bg_color': '#4a5568', 'font_color': 'white', 'border': 1
+            }),
+            'datetime': self.workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm'})
+        }
+
+    def write_catalogue(self, q, progress=None):
+        """Write the artifacts of q, one sheet per collection, and their media to the workbook
+
+        Every artifact column is written with its type, followed by the
+        number of media files and the primary image's filename.
+
+        Args:
+            q: Artifact query selecting the rows, already ordered
+            progress: Optional callback receiving the completion percentage
+        """
+        artifact_columns = list(Artifact.__table__.columns)
+        media_count = select(func.count(Media.id)).where(
+            Media.artifact_id == Artifact.id
+        ).correlate(Artifact).scalar_subquery()
+        # Same choice as Media.pick_primary: the primary image, else the first one
+        primary_image = select(Media.original_filename).where(
+            Media.artifact_id == Artifact.id
+        ).order_by(
+            Media.is_primary.is_(True).desc(), Media.sort_order, Media.created_at
+        ).limit(1).correlate(Artifact).scalar_subquery()
+
+        kinds = [_cell_kind(c) for c in artifact_columns] + ['number', 'string']
+        headers = [c.name for c in artifact_columns] + ['media_count', 'primary_image']
+        collection_index = artifact_columns.index(Artifact.__table__.c.collection)
+
+        # Sheets are created up front, so they appear in collection order
+        used = {MEDIA_SHEET.lower()}
+        collections = sorted(c for (c,) in q.with_entities(Artifact.collection).order_by(None).distinct())
+        sheets = {c: self._add_sheet(_sheet_name(c, used), headers, kinds) for c in collections}
+        media_sheet = self._add_sheet(
+            MEDIA_SHEET,
+            ['artifact_sequence_number', 'artifact_collection'] + [c.name for c in Media.__table__.columns],
+            ['string', 'string'] + [_cell_kind(c) for c in Media.__table__.columns]
+        )
+
+        total = q.order_by(None).count() if progress else 0
+        rows = q.with_entities(*artifact_columns, media_count, primary_image).yield_per(XLSX_BATCH_SIZE)
+        for i, row in enumerate(rows, 1):
+            self._append(sheets[row[collection_index]], row)
+            if progress and i % XLSX_BATCH_SIZE == 0:
+                progress(i / total * 90)
+
+        selected = q.with_entities(Artifact.id).order_by(None).subquery()
+        media_rows = db.session.query(
+            Artifact.sequence_number, Artifact.collection, *Media.__table__.columns
+        ).join(Artifact, Media.artifact_id == Artifact.id).filter(
+            Artifact.id.in_(select(selected.c.id))
+        ).order_by(
+            Artifact.sequence_number, Media.sort_order, Media.created_at
+        ).yield_per(XLSX_BATCH_SIZE)
+        for row in media_rows:
+            self._append(media_sheet, row)
+
+        for sheet in [*sheets.values(), media_sheet]:
+            if sheet.last_row:
+                sheet.worksheet.autofilter(0, 0, sheet.last_row, len(sheet.kinds) - 1)
+
+    def close(self):
+        self.workbook.close()
+
+    def _add_sheet(self, name: str, headers: List[str], kinds: List[str]) -> _Sheet:
+        worksheet = self.workbook.add_worksheet(name)
+        for col, (header, kind) in enumerate(zip(headers, kinds)):
+            worksheet.set_column(col, col, 40 if kind in ('string', 'json') else 16)
+            worksheet.write_string(0, col, header, self.formats['header'])
+        worksheet.freeze_panes(1, 0)
+        return _Sheet(worksheet, kinds)
+
+    def _append(self, sheet: _Sheet, values):
+        """Write one row below the last one; empty values are left blank"""
+        sheet.last_row += 1
+        row = sheet.last_row
+        worksheet = sheet.worksheet
+        for col, (value, kind) in enumerate(zip(values, sheet.kinds)):
+            if value is None:
+                continue
+            if kind == 'number':
+                worksheet.write_number(row, col, value)
+            elif kind == 'boolean':
+                worksheet.write_boolean(row, col, value)
+            elif kind == 'datetime':
+                worksheet.write_datetime(row, col, value, self.formats['datetime'])
+            else:
+                if kind == 'json':
+                    value = json.dumps(value, ensure_ascii=False)
+                worksheet.write_string(row, col, str(value)[:MAX_CELL_CHARS])
+
+
+def write_catalogue_xlsx(output: BinaryIO, q, progress=None):
+    """Write the artifacts of q and their media as an .xlsx workbook to output"""
+    service = XlsxService(output)
+    try:
+        service.write_catalogue(q, progress)
+    finally:
+        service.close()
@@ -1,69 +1,201 @@
+import itertools
+import threading
 import zipfile
-import io
 import json
+from typing import Dict, Iterator, List, Optional
 from flask import current_app
-from .dropbox_service import DropboxService
+from ..models import Media
+from .dropbox_service import ChunkStream, DropboxService
+from .prefetch import export_prefetcher
+
+# Media above this size is streamed by the writer, not held in memory
+PREFETCH_MAX_BYTES = 32 * 1024 * 1024
+# Bytes all prefetch threads together may hold ahead of the writer
+PREFETCH_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+def _close(content):
+    """Release the download behind a chunk stream; bytes hold nothing open."""
+    if isinstance(content, ChunkStream):
+        content.close()
+
+
+class _ReadAheadBudget:
+    """Byte allowance shared by the prefetch threads of one export."""
+
+    def __init__(self, max_bytes: int):
+        self.available = max_bytes
+        self._lock = threading.Lock()
+
+    def take(self, n: int) -> bool:
+        """Reserve n bytes if they fit; never blocks."""
+        with self._lock:
+            if n > self.available:
+                return False
+            self.available -= n
+            return True
+
+    def give(self, n: int):
+        with self._lock:
+            self.available += n
+
+
+class _ZipSink:
+    """
+    Write-only, unseekable file object collecting what ZipFile writes.
+    ZipFile cannot seek back into it, so it writes a data descriptor after
+    each entry instead of patching the sizes into the local header.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return iter(chunks)
 
 
 class ZipService:
     def __init__(self):
         self.dropbox = DropboxService()
 
-    def create_zip(self, artifacts: list, include_metadata: bool = True) -> bytes:
-        """Create a ZIP file with images and optional metadata"""
-        buffer = io.BytesIO()
+    def stream_zip(self, artifacts: list, include_metadata: bool = True, progress=None,
+                   media: Optional[Dict[str, List[Media]]] = None) -> Iterator[bytes]:
+        """Stream a ZIP file with images and optional metadata as it is written
+
+        Media downloads run ahead of the writer on the export prefetcher; each
+        entry is compressed and yielded as soon as its turn comes. Files read
+        ahead share PREFETCH_BUDGET_BYTES; files above PREFETCH_MAX_BYTES, and
+        any file once the budget is spent, are only opened ahead and streamed
+        in chunks. Memory is bounded by the budget plus one chunk per
+        prefetch thread and the compressor buffers, whatever the size of the
+        export or whether media sizes are recorded.
+
+        Args:
+            progress: Optional callback receiving the completion percentage
+            media: Preloaded artifact id -> media map (Media.by_artifact);
+                   loaded here in one query when not given
+        """
+        sink = _ZipSink()
+        if media is None:
+            media = Media.by_artifact(artifact.id for artifact in artifacts)
+        plans = [(artifact, media.get(artifact.id, [])) for artifact in artifacts]
+        budget = _ReadAheadBudget(PREFETCH_BUDGET_BYTES)
+        fetched = export_prefetcher(
+            lambda source: self._fetch(source, budget), release=lambda result: _close(result[0])
+        ).iter(
+            (media_file, (media_file.dropbox_path, media_file.file_size))
+            for _, media_files in plans for media_file in media_files
+        )
+
+        try:
+            with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+                for i, (artifact, media_files) in enumerate(plans):
+                    folder_name = f"{artifact.sequence_number}"
 
-        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for artifact in artifacts:
-                folder_name = f"{artifact.sequence_number}"
+                    # Add images
+                    for media_file, result, error in (next(fetched) for _ in media_files):
+                        if error is not None:
+                            current_app.logger.error(
+                                f'Error downloading {media_file.dropbox_path}: {str(error)}'
+                            )
+                            continue
 
-                # Add images
-                for media in artifact.media_files.all():
-                    try:
-                        img_data = self.dropbox.download_file(media.dropbox_path)
+                        content, held = result
+                        # Without seeking back, ZIP64 extra fields must be reserved up front
+                        force_zip64 = (media_file.file_size or 0) > zipfile.ZIP64_LIMIT
+                        try:
+                            with zf.open(f"{folder_name}/{media_file.original_filename}", 'w', force_zip64=force_zip64) as entry:
+                                for chunk in ([content] if isinstance(content, bytes) else content):
+                                    entry.write(chunk)
+                                    yield from sink.drain()
+                        finally:
+                            # Also reached when the client disconnects mid-entry
+                            _close(content)
+                            budget.give(held)
+                        yield from sink.drain()
+
+                    # Add metadata JSON
+                    if include_metadata:
+                        metadata = {
+                            'id': artifact.id,
+                            'sequence_number': artifact.sequence_number,
+                            'accession_number': artifact.accession_number,
+                            'other_accession_number': artifact.other_accession_number,
+                            'on_display': artifact.on_display,
+                            'object_type': artifact.object_type,
+                            'material': artifact.material,
+                            'size_dimensions': artifact.size_dimensions,
+                            'weight': artifact.weight,
+                            'technique': artifact.technique,
+                            'description_catalogue': artifact.description_catalogue,
+                            'description_observation': artifact.description_observation,
+                            'inscription': artifact.inscription,
+                            'findspot': artifact.findspot,
+                            'production_place': artifact.production_place,
+                            'chronology': artifact.chronology,
+                            'bibliography': artifact.bibliography,
+                            'remarks': artifact.remarks,
+                            'images': [
+                                {
+                                    'filename': m.original_filename,
+                                    'caption': m.caption,
+                                    'is_primary': m.is_primary
+                                }
+                                for m in media_files
+                            ]
+                        }
                         zf.writestr(
-                            f"{folder_name}/{media.original_filename}",
-                            img_data
-                        )
-                    except Exception as e:
-                        current_app.logger.error(
-                            f'Error downloading {media.dropbox_path}: {str(e)}'
+                            f"{folder_name}/metadata.json",
+                            json.dumps(metadata, indent=2, ensure_ascii=False)
                         )
+                        yield from sink.drain()
+
+                    if progress:
+                        progress((i + 1) / len(artifacts) * 100)
+        finally:
+            fetched.close()
+
+        # Central directory
+        yield from sink.drain()
+
+    def _fetch(self, source, budget: _ReadAheadBudget):
+        """
+        Runs on a prefetch thread: (content, bytes held against the budget).
+        Content is the file's bytes, or a chunk iterator for files that are
+        too large, of unknown size beyond what the budget allows, or arrive
+        when the budget is spent.
+        """
+        dropbox_path, file_size = source
+        if file_size is not None and file_size <= PREFETCH_MAX_BYTES and budget.take(file_size):
+            try:
+                return self.dropbox.download_file(dropbox_path), file_size
+            except Exception:
+                budget.give(file_size)
+                raise
+        if file_size is not None:
+            return self.dropbox.iter_file(dropbox_path), 0
 
-                # Add metadata JSON
-                if include_metadata:
-                    metadata = {
-                        'id': artifact.id,
-                        'sequence_number': artifact.sequence_number,
-                        'accession_number': artifact.accession_number,
-                        'other_accession_number': artifact.other_accession_number,
-                        'on_display': artifact.on_display,
-                        'object_type': artifact.object_type,
-                        'material': artifact.material,
-                        'size_dimensions': artifact.size_dimensions,
-                        'weight': artifact.weight,
-                        'technique': artifact.technique,
-                        'description_catalogue': artifact.description_catalogue,
-                        'description_observation': artifact.description_observation,
-                        'inscription': artifact.inscription,
-                        'findspot': artifact.findspot,
-                        'production_place': artifact.production_place,
-                        'chronology': artifact.chronology,
-                        'bibliography': artifact.bibliography,
-                        'remarks': artifact.remarks,
-                        'images': [
-                            {
-                                'filename': m.original_filename,
-                                'caption': m.caption,
-                                'is_primary': m.is_primary
-                            }
-                            for m in artifact.media_files.all()
-                        ]
-                    }
-                    zf.writestr(
-                        f"{folder_name}/metadata.json",
-                        json.dumps(metadata, indent=2, ensure_ascii=False)
-                    )
-
-        buffer.seek(0)
-        return buffer.read()
+        # Unknown size (e.g. bulk imports): read ahead while the budget allows
+        chunks = self.dropbox.iter_file(dropbox_path)
+        head = []
+        held = 0
+        try:
+            for chunk in chunks:
+                head.append(chunk)
+                if held + len(chunk) > PREFETCH_MAX_BYTES or not budget.take(len(chunk)):
+                    return ChunkStream(itertools.chain(head, chunks), chunks.close), held
+                held += len(chunk)
+        except Exception:
+            chunks.close()
+            budget.give(held)
+            raise
+        return b''.join(head), held
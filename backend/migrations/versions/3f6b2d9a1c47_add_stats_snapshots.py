@@ -0,0 +1,31 @@
+"""Add stats snapshots
+
+Revision ID: 3f6b2d9a1c47
+Revises: c8c028386cf7
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f6b2d9a1c47'
+down_revision = 'c8c028386cf7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stats_snapshots',
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('collection', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('is_stale', sa.Boolean(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('kind', 'collection')
+    )
+
+
+def downgrade():
+    op.drop_table('stats_snapshots')
@@ -0,0 +1,45 @@
+"""Add completeness score to artifacts
+
+Revision ID: 8a1e5c07d2f3
+Revises: 3f6b2d9a1c47
+Create Date: 2026-10-19 10:02:17.540318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a1e5c07d2f3'
+down_revision = '3f6b2d9a1c47'
+branch_labels = None
+depends_on = None
+
+# COMPLETENESS_FIELDS as of this revision
+COMPLETENESS_FIELDS = [
+    'accession_number', 'object_type', 'material', 'size_dimensions',
+    'description_observation', 'chronology', 'findspot'
+]
+
+
+def upgrade():
+    with op.batch_alter_table('artifacts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('completeness_score', sa.Float(), nullable=False, server_default='0'))
+        batch_op.create_index('ix_artifacts_collection_completeness', ['collection', 'completeness_score', 'id'], unique=False)
+
+    # Score existing rows in one statement, same formula as Artifact.compute_completeness;
+    # `flask backfill-completeness` recomputes them if the fields ever change
+    filled = ' + '.join(
+        f"CASE WHEN {field} IS NOT NULL AND {field} <> '' THEN 1 ELSE 0 END"
+        for field in COMPLETENESS_FIELDS
+    )
+    op.execute(
+        f'UPDATE artifacts SET completeness_score = '
+        f'ROUND(CAST(({filled}) * 100.0 / {len(COMPLETENESS_FIELDS)} AS NUMERIC), 1)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('artifacts', schema=None) as batch_op:
+        batch_op.drop_index('ix_artifacts_collection_completeness')
+        batch_op.drop_column('completeness_score')
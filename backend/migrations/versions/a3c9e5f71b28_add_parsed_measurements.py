@@ -0,0 +1,37 @@
+"""Add parsed dimension and weight to artifacts
+
+Revision ID: a3c9e5f71b28
+Revises: e7a4b19c3d05
+Create Date: 2026-10-19 17:41:06.522913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c9e5f71b28'
+down_revision = 'e7a4b19c3d05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows stay empty until `flask backfill-measurements` is run
+    with op.batch_alter_table('artifacts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('max_dimension_mm', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('dimension_confidence', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('weight_g', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('weight_confidence', sa.String(length=10), nullable=True))
+        batch_op.create_index(batch_op.f('ix_artifacts_max_dimension_mm'), ['max_dimension_mm'], unique=False)
+        batch_op.create_index(batch_op.f('ix_artifacts_weight_g'), ['weight_g'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('artifacts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_artifacts_weight_g'))
+        batch_op.drop_index(batch_op.f('ix_artifacts_max_dimension_mm'))
+        batch_op.drop_column('weight_confidence')
+        batch_op.drop_column('weight_g')
+        batch_op.drop_column('dimension_confidence')
+        batch_op.drop_column('max_dimension_mm')
@@ -0,0 +1,36 @@
+"""Add activity rollups
+
+Revision ID: b94d27e6f815
+Revises: 8a1e5c07d2f3
+Create Date: 2026-10-19 10:48:55.902113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b94d27e6f815'
+down_revision = '8a1e5c07d2f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Populate with `flask backfill-timeline` after upgrading
+    op.create_table('activity_rollups',
+    sa.Column('collection', sa.String(length=50), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('collection', 'day', 'entity')
+    )
+    with op.batch_alter_table('activity_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_activity_rollups_day', ['day'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('activity_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_activity_rollups_day')
+
+    op.drop_table('activity_rollups')
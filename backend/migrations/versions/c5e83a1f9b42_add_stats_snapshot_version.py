@@ -0,0 +1,26 @@
+"""Add version to stats snapshots
+
+Revision ID: c5e83a1f9b42
+Revises: f1b7d2c94e60
+Create Date: 2026-10-19 21:14:05.613920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e83a1f9b42'
+down_revision = 'f1b7d2c94e60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('stats_snapshots', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('stats_snapshots', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,46 @@
+"""Add chronology date range to artifacts and thesaurus
+
+Revision ID: e7a4b19c3d05
+Revises: d52c8f31a6e9
+Create Date: 2026-10-19 15:12:40.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a4b19c3d05'
+down_revision = 'd52c8f31a6e9'
+branch_labels = None
+depends_on = None
+
+
+def _has_thesaurus():
+    # The thesaurus table is created by `flask init-db`, not by a migration
+    return 'thesaurus' in sa.inspect(op.get_bind()).get_table_names()
+
+
+def upgrade():
+    # Existing rows stay undated until `flask backfill-chronology` is run
+    with op.batch_alter_table('artifacts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('date_start', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('date_end', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_artifacts_date_range', ['date_start', 'date_end'], unique=False)
+
+    if _has_thesaurus():
+        with op.batch_alter_table('thesaurus', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('date_start', sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column('date_end', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    if _has_thesaurus():
+        with op.batch_alter_table('thesaurus', schema=None) as batch_op:
+            batch_op.drop_column('date_end')
+            batch_op.drop_column('date_start')
+
+    with op.batch_alter_table('artifacts', schema=None) as batch_op:
+        batch_op.drop_index('ix_artifacts_date_range')
+        batch_op.drop_column('date_end')
+        batch_op.drop_column('date_start')
@@ -0,0 +1,26 @@
+"""Add heartbeat to jobs
+
+Revision ID: f1b7d2c94e60
+Revises: a3c9e5f71b28
+Create Date: 2026-10-19 20:02:37.418265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b7d2c94e60'
+down_revision = 'a3c9e5f71b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
@@ -0,0 +1,116 @@
+"""
+Regression tests for the vectorized material and chronology analyses.
+The reference implementation is the previous groupby/value_counts version;
+both must produce identical JSON on the same frame.
+"""
+import json
+import random
+from typing import Dict
+
+import pandas as pd
+import pytest
+
+from app.services.analytics_service import AnalyticsService
+
+
+class ReferenceAnalyticsService(AnalyticsService):
+    """AnalyticsService with the material and chronology analyses as they were before vectorization."""
+
+    def get_material_analysis(self) -> Dict:
+        if 'material' not in self.df.columns:
+            return {'error': 'No material data available'}
+
+        material_data = self.df.groupby('material', observed=True).agg({
+            'id': 'count',
+            'on_display': 'mean' if 'on_display' in self.df.columns else lambda x: 0,
+            'collection': lambda x: x.value_counts().loc[lambda v: v > 0].to_dict() if 'collection' in self.df.columns else {}
+        }).reset_index()
+
+        materials = []
+        for _, row in material_data.iterrows():
+            materials.append({
+                'material': row['material'],
+                'count': int(row['id']),
+                'percentage': round(row['id'] / len(self.df) * 100, 2),
+                'on_display_pct': round(row['on_display'] * 100, 1) if isinstance(row['on_display'], float) else 0,
+                'by_collection': row['collection'] if isinstance(row['collection'], dict) else {}
+            })
+
+        materials = sorted(materials, key=lambda x: x['count'], reverse=True)
+
+        return {
+            'materials': materials,
+            'total_types': len(materials),
+            'narrative': self._generate_material_narrative(materials)
+        }
+
+    def get_chronological_analysis(self) -> Dict:
+        if 'chronology' not in self.df.columns:
+            return {'error': 'No chronology data available'}
+
+        chrono_data = self.df.groupby('chronology', observed=True).agg({
+            'id': 'count',
+            'material': lambda x: x.value_counts().loc[lambda v: v > 0].head(3).to_dict() if 'material' in self.df.columns else {},
+            'object_type': lambda x: x.value_counts().loc[lambda v: v > 0].head(3).to_dict() if 'object_type' in self.df.columns else {}
+        }).reset_index()
+
+        periods = []
+        for _, row in chrono_data.iterrows():
+            periods.append({
+                'period': row['chronology'],
+                'count': int(row['id']),
+                'percentage': round(row['id'] / len(self.df) * 100, 2),
+                'top_materials': row['material'] if isinstance(row['material'], dict) else {},
+                'top_types': row['object_type'] if isinstance(row['object_type'], dict) else {}
+            })
+
+        periods = sorted(periods, key=lambda x: x['count'], reverse=True)
+
+        return {
+            'periods': periods,
+            'total_periods': len(periods),
+            'narrative': self._generate_chronology_narrative(periods)
+        }
+
+
+def _frame(rows: int, materials: int, seed: int) -> pd.DataFrame:
+    """Fixed synthetic catalogue with missing values and many count ties."""
+    rnd = random.Random(seed)
+
+    def pick(options):
+        return None if rnd.random() < 0.1 else rnd.choice(options)
+
+    return pd.DataFrame([
+        {
+            'id': str(i),
+            'collection': rnd.choice(['chennai', 'british', 'florence_museum']),
+            'object_type': pick([f'type {j}' for j in range(30)]),
+            'material': pick([f'material {j}' for j in range(materials)]),
+            'chronology': pick([f'period {j}' for j in range(40)]),
+            'findspot': pick(['site A', 'site B']),
+            'on_display': rnd.choice([True, False, None])
+        }
+        for i in range(rows)
+    ])
+
+
+@pytest.mark.parametrize('rows, materials, seed', [
+    (7, 3, 5),
+    (50, 5, 1),
+    (300, 20, 2),
+    (2000, 200, 3)
+])
+@pytest.mark.parametrize('analysis', ['get_material_analysis', 'get_chronological_analysis'])
+def test_analysis_matches_reference(analysis, rows, materials, seed):
+    df = _frame(rows, materials, seed)
+    expected = getattr(ReferenceAnalyticsService(df.copy()), analysis)()
+    actual = getattr(AnalyticsService(df.copy()), analysis)()
+
+    assert json.dumps(actual) == json.dumps(expected)
+
+
+def test_analyses_without_columns():
+    service = AnalyticsService(pd.DataFrame({'id': ['1', '2']}))
+
+    assert service.get_material_analysis() == {'error': 'No material data available'}
+    assert service.get_chronological_analysis() == {'error': 'No chronology data available'}
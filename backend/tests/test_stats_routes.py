@@ -0,0 +1,74 @@
+"""
+Statement count of the stats dashboard.
+Runs against the Postgres database in TEST_DATABASE_URL (the dashboard
+query uses Postgres JSON aggregates) and is skipped when it is unreachable.
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.extensions import db
+from app.models import Artifact, Media, Submission, User
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        try:
+            db.create_all()
+        except OperationalError as e:
+            pytest.skip(f'test database unavailable: {e.orig}')
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def headers(app):
+    user = User(email='curator@museum.org', role='admin')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.flush()
+    for i, (collection, material) in enumerate([('chennai', 'Iron'), ('chennai', 'Bronze'), ('british', None)]):
+        artifact = Artifact(sequence_number=f'CM_{i}', collection=collection, material=material,
+                            object_type='Bangle', on_display=i == 0, created_by=user.id)
+        db.session.add(artifact)
+        db.session.flush()
+        db.session.add(Media(artifact_id=artifact.id, filename=f'{i}.jpg',
+                             original_filename=f'{i}.jpg', dropbox_path=f'/{i}.jpg'))
+    db.session.add(Submission(researcher_name='Researcher', researcher_email='r@uni.edu', status='pending'))
+    db.session.commit()
+
+    token = create_access_token(identity=user.id, additional_claims={'role': user.role})
+    yield {'Authorization': f'Bearer {token}'}
+
+    db.session.rollback()
+    for model in (Media, Artifact, Submission, User):
+        model.query.delete()
+    db.session.execute(db.metadata.tables['stats_snapshots'].delete())
+    db.session.commit()
+
+
+def test_dashboard_is_one_statement(app, headers):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = app.test_client().get('/api/stats/dashboard?fresh=true', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200
+    assert response.get_json()['totals'] == {
+        'artifacts': 3, 'on_display': 1, 'not_on_display': 2, 'media': 3,
+        'annotations': 0, 'users': 1, 'pending_submissions': 1
+    }
+    # Reading and storing the snapshot aside, the payload is a single query
+    payload_statements = [s for s in statements if 'stats_snapshots' not in s]
+    assert len(payload_statements) == 1